@@ -0,0 +1,125 @@
+from core.config import INPUT_EXAMPLE, MODEL_WATCH_INTERVAL
+from core.errors import ModelLoadException, ModelNotFoundException, PredictException
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from models.prediction import (
+    ModelInfoResponse,
+    ModelRegistryResponse,
+    ShadowStatsResponse,
+)
+from services.predict import MachineLearningModelHandlerScore as model
+from services.watcher import ModelWatcher
+
+from api.routes import predictor
+
+router = APIRouter()
+
+
+async def swap_model():
+    warmup_input = await run_in_threadpool(
+        predictor.health_monitor.load_example, INPUT_EXAMPLE
+    )
+    await run_in_threadpool(model.reload, predictor.load_wrapper, warmup_input)
+    await predictor.executor.recycle(predictor.get_prediction, warmup_input)
+
+
+async def register_shadow(version):
+    """Load ``version`` through the registry and score it in the shadow."""
+    version = predictor.registry.resolve(version)
+    if version is None:
+        raise ModelNotFoundException("The main model cannot be its own shadow")
+    entry = await run_in_threadpool(predictor.registry.get, version)
+    model.register_shadow(entry.model, version)
+    predictor.shadow.reset()
+    logger.info(f"model version {version} registered as shadow")
+
+
+model_watcher = ModelWatcher(
+    model.model_path, lambda: model.version, swap_model, interval=MODEL_WATCH_INTERVAL
+)
+
+
+@router.get(
+    "/model",
+    response_model=ModelInfoResponse,
+    name="admin:get-model",
+)
+async def model_info():
+    return ModelInfoResponse(**model.info())
+
+
+@router.post(
+    "/model/reload",
+    response_model=ModelInfoResponse,
+    name="admin:reload-model",
+)
+async def reload_model():
+    """Reload the model in the worker serving this request.
+
+    Other workers pick the new file up through their ``model_watcher``.
+    """
+    try:
+        await swap_model()
+    except (Exception, ModelLoadException, PredictException) as err:
+        raise HTTPException(status_code=500, detail=f"Exception: {err}") from err
+    return ModelInfoResponse(**model.info())
+
+
+@router.get(
+    "/models",
+    response_model=ModelRegistryResponse,
+    name="admin:get-models",
+)
+async def registry_info():
+    registry = predictor.registry
+    return ModelRegistryResponse(
+        loads=registry.loads,
+        evictions=registry.evictions,
+        traffic_split=registry.traffic_split,
+        versions=registry.stats(),
+    )
+
+
+def shadow_response():
+    return ShadowStatsResponse(version=model.shadow_version, **predictor.shadow.stats())
+
+
+@router.get(
+    "/model/shadow",
+    response_model=ShadowStatsResponse,
+    name="admin:get-shadow",
+)
+async def shadow_info():
+    return shadow_response()
+
+
+@router.put(
+    "/model/shadow/{version}",
+    response_model=ShadowStatsResponse,
+    name="admin:set-shadow",
+)
+async def set_shadow(version: str):
+    """Compare ``MODEL_PATH/<version>`` against the main model on live traffic.
+
+    Predictions of the main model are replayed to it in the background,
+    only agreement and latency aggregates are kept.
+    """
+    try:
+        await register_shadow(version)
+    except ModelNotFoundException as err:
+        raise HTTPException(status_code=404, detail=str(err)) from err
+    except (Exception, ModelLoadException) as err:
+        raise HTTPException(status_code=500, detail=f"Exception: {err}") from err
+    return shadow_response()
+
+
+@router.delete(
+    "/model/shadow",
+    response_model=ShadowStatsResponse,
+    name="admin:delete-shadow",
+)
+async def delete_shadow():
+    model.register_shadow(None)
+    await predictor.shadow.stop()
+    return shadow_response()
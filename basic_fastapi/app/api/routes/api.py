@@ -1,6 +1,9 @@
 from fastapi import APIRouter
 
-from api.routes import predictor
+from api.routes import admin, logs, metrics, predictor
 
 router = APIRouter()
 router.include_router(predictor.router, tags=["predictor"], prefix="/v1")
+router.include_router(admin.router, tags=["admin"], prefix="/v1/admin")
+router.include_router(logs.router, tags=["logs"], prefix="/v1/logs")
+router.include_router(metrics.router, tags=["metrics"], prefix="/v1")
@@ -0,0 +1,182 @@
+import json
+from typing import Annotated, Optional
+
+from core.config import (
+    LOGS_PAGE_MAX_SIZE,
+    LOGS_PAGE_SIZE,
+    PAGINATION_COUNT_TTL,
+    RETENTION_ARCHIVE_DIR,
+    RETENTION_BATCH_ROWS,
+    RETENTION_FLAG,
+    RETENTION_HOT_DAYS,
+    RETENTION_HOT_ROWS,
+    RETENTION_INTERVAL,
+    RETENTION_PAUSE,
+    RETENTION_VACUUM_PAGES,
+)
+from core.paginator import CountCache, InvalidCursor, keyset_page
+from db import AsyncSessionLocal, SessionLocal, engine, run_session
+from fastapi import APIRouter, HTTPException, Query
+from models.log import PredictionLog, RequestLog
+from models.prediction import (
+    FeatureStats,
+    FeatureStatsResponse,
+    LabelCount,
+    LabelCountsResponse,
+    RequestLogEntry,
+    RequestLogPage,
+    RetentionStatsResponse,
+)
+from services.codec import FEATURES
+from services.retention import LogRetention
+from sqlalchemy import func, select
+
+from api.routes import predictor
+
+router = APIRouter()
+
+session_factory = AsyncSessionLocal or SessionLocal
+count_cache = CountCache(ttl=PAGINATION_COUNT_TTL)
+log_retention = LogRetention(
+    engine,
+    RETENTION_ARCHIVE_DIR,
+    hot_days=RETENTION_HOT_DAYS,
+    hot_rows=RETENTION_HOT_ROWS,
+    batch_rows=RETENTION_BATCH_ROWS,
+    interval=RETENTION_INTERVAL,
+    pause=RETENTION_PAUSE,
+    vacuum_pages=RETENTION_VACUUM_PAGES,
+    busy_fn=lambda: predictor.executor.queued() > 0,
+)
+
+
+def read_logs(db, limit, cursor):
+    page = keyset_page(
+        db,
+        select(RequestLog),
+        RequestLog.id,
+        limit=limit,
+        cursor=cursor,
+        count_cache=count_cache,
+    )
+    return RequestLogPage(
+        listings=[
+            RequestLogEntry(
+                id=log.id,
+                request=json.loads(log.request),
+                response=json.loads(log.response),
+            )
+            for log in page["listings"]
+        ],
+        next_cursor=page["next_cursor"],
+        page_size=page["pageSize"],
+        total_count=page["totalCount"],
+    )
+
+
+@router.get(
+    "",
+    response_model=RequestLogPage,
+    name="logs:get-logs",
+)
+async def list_logs(
+    limit: Annotated[int, Query(ge=1, le=LOGS_PAGE_MAX_SIZE)] = LOGS_PAGE_SIZE,
+    cursor: Optional[str] = None,
+):
+    """Page through the request log oldest first.
+
+    Pass the ``next_cursor`` of a page as ``?cursor=`` to get the next one,
+    it is ``null`` on the last page. ``total_count`` may lag behind by up to
+    ``PAGINATION_COUNT_TTL`` seconds.
+    """
+    try:
+        return await run_session(session_factory, read_logs, limit, cursor)
+    except InvalidCursor as err:
+        raise HTTPException(status_code=422, detail=str(err)) from err
+
+
+def time_filters(since, until, model_version):
+    """``WHERE`` clauses for an epoch-seconds window and a model version."""
+    filters = []
+    if since is not None:
+        filters.append(PredictionLog.created_ms >= int(since * 1000))
+    if until is not None:
+        filters.append(PredictionLog.created_ms < int(until * 1000))
+    if model_version is not None:
+        filters.append(PredictionLog.model_version == model_version)
+    return filters
+
+
+def read_label_counts(db, window, filters):
+    bucket = PredictionLog.created_ms // (window * 1000)
+    statement = (
+        select(bucket.label("bucket"), PredictionLog.label, func.count())
+        .where(*filters)
+        .group_by(bucket, PredictionLog.label)
+        .order_by(bucket, PredictionLog.label)
+    )
+    rows = db.execute(statement).all()
+    return LabelCountsResponse(
+        window_seconds=window,
+        counts=[
+            LabelCount(window_start=bucket * window, label=label, count=count)
+            for bucket, label, count in rows
+        ],
+    )
+
+
+def read_feature_stats(db, filters):
+    columns = [func.count()]
+    for name in FEATURES:
+        column = getattr(PredictionLog, name)
+        columns += [func.avg(column), func.avg(column * column)]
+    count, *moments = db.execute(select(*columns).where(*filters)).one()
+    features = {}
+    for name, mean, square_mean in zip(FEATURES, moments[::2], moments[1::2]):
+        variance = None if mean is None else max(square_mean - mean * mean, 0.0)
+        features[name] = FeatureStats(mean=mean, variance=variance)
+    return FeatureStatsResponse(count=count, features=features)
+
+
+@router.get(
+    "/labels",
+    response_model=LabelCountsResponse,
+    name="logs:get-label-counts",
+)
+async def label_counts(
+    window: Annotated[int, Query(ge=1)] = 3600,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    model_version: Annotated[Optional[str], Query(alias="model")] = None,
+):
+    """Count predictions per label in ``window``-second buckets.
+
+    Reads the columnar ``prediction_logs`` table, grouping happens in SQL.
+    ``since`` and ``until`` are epoch seconds.
+    """
+    filters = time_filters(since, until, model_version)
+    return await run_session(session_factory, read_label_counts, window, filters)
+
+
+@router.get(
+    "/features",
+    response_model=FeatureStatsResponse,
+    name="logs:get-feature-stats",
+)
+async def feature_stats(
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    model_version: Annotated[Optional[str], Query(alias="model")] = None,
+):
+    """Mean and population variance of every feature, computed in SQL."""
+    filters = time_filters(since, until, model_version)
+    return await run_session(session_factory, read_feature_stats, filters)
+
+
+@router.get(
+    "/retention",
+    response_model=RetentionStatsResponse,
+    name="logs:get-retention",
+)
+async def retention_stats():
+    return RetentionStatsResponse(enabled=RETENTION_FLAG, **log_retention.stats())
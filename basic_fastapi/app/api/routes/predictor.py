@@ -1,25 +1,238 @@
-import json
-from pathlib import Path
-
-import joblib
-from core.config import INPUT_EXAMPLE
-from fastapi import APIRouter, HTTPException
-from fastapi.concurrency import run_in_threadpool
-from loguru import logger
-from db import SessionLocal
-from models.log import RequestLog
+import time
+from functools import partial
+from typing import Annotated, List, Optional
+
+import numpy as np
+from core.config import (
+    BATCH_MAX_SIZE,
+    HEALTH_CHECK_INTERVAL,
+    HEALTH_RETRY_INTERVAL,
+    INFERENCE_BACKEND,
+    INFERENCE_DEADLINE_MS,
+    INFERENCE_POOL_SIZE,
+    INFERENCE_QUEUE_DEPTH,
+    INPUT_EXAMPLE,
+    MICRO_BATCH_MAX_SIZE,
+    MICRO_BATCH_WAIT_MS,
+    MICRO_BATCHING_FLAG,
+    MODEL_NAME,
+    MODEL_PATH,
+    MODEL_REGISTRY_MEMORY_MB,
+    MODEL_TRAFFIC_SPLIT,
+    PREDICTION_CACHE_FLAG,
+    PREDICTION_COALESCE_FLAG,
+    PREDICTION_CACHE_SIZE,
+    PREDICTION_CACHE_TTL,
+    REQUEST_LOG_ASYNC,
+    REQUEST_LOG_BATCH_SIZE,
+    REQUEST_LOG_FLAG,
+    REQUEST_LOG_FLUSH_INTERVAL,
+    REQUEST_LOG_FORMAT,
+    REQUEST_LOG_OVERFLOW,
+    REQUEST_LOG_QUEUE_SIZE,
+    SHADOW_BATCH_SIZE,
+    SHADOW_FLUSH_INTERVAL,
+    SHADOW_QUEUE_ROWS,
+    STREAM_CHUNK_ROWS,
+    STREAM_MAX_LINE_BYTES,
+)
+from core.errors import ModelNotFoundException
+from core.events import model_load_stats
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+from db import AsyncSessionLocal, SessionLocal
 from models.prediction import (
+    BatcherStatsResponse,
+    CacheStatsResponse,
+    CoalescerStatsResponse,
     HealthResponse,
+    MachineLearningBatchResponse,
     MachineLearningDataInput,
     MachineLearningResponse,
 )
+from services.admission import AdmissionController, Overloaded
+from services.batching import MicroBatcher
+from services.coalescing import SingleFlight
+from services.codec import (
+    DecodeError,
+    StreamDecoder,
+    decode_rows,
+    dumps,
+    iter_line_chunks,
+)
+from services.executor import InferenceExecutor, load_worker_model
+from services.health import HealthMonitor
+from services.log_writer import RequestLogWriter
+from services.metrics import metrics, request_started
 from services.predict import MachineLearningModelHandlerScore as model
+from services.predict import PredictionCache, get_load_wrapper
+from services.registry import DEFAULT_VERSION, ModelRegistry, parse_traffic_split
+from services.shadow import ShadowEvaluator
 
 router = APIRouter()
 
+load_wrapper = get_load_wrapper()
+
 
 def get_prediction(data_point):
-    return model.predict(data_point, load_wrapper=joblib.load, method="predict")
+    return model.predict(data_point, load_wrapper=load_wrapper, method="predict")
+
+
+def get_batch_prediction(data_points):
+    return get_prediction(data_points)
+
+
+def get_version_prediction(version, data_point):
+    return registry.predict(version, data_point)
+
+
+registry = ModelRegistry(
+    load_wrapper,
+    MODEL_PATH,
+    MODEL_NAME,
+    memory_budget_bytes=MODEL_REGISTRY_MEMORY_MB * 2**20,
+    traffic_split=parse_traffic_split(MODEL_TRAFFIC_SPLIT),
+)
+
+
+stage_seconds = metrics.histogram(
+    "predict_stage_seconds", "Time spent in each stage of a prediction.", ("stage",)
+)
+parse_stage = stage_seconds.labels("parse")
+queue_stage = stage_seconds.labels("queue")
+model_stage = stage_seconds.labels("model")
+log_stage = stage_seconds.labels("log")
+
+
+def observe_parse():
+    started = request_started.get()
+    if started is not None:
+        parse_stage.observe(time.perf_counter() - started)
+
+
+def observe_inference(queue_seconds, run_seconds):
+    queue_stage.observe(queue_seconds)
+    model_stage.observe(run_seconds)
+
+
+admission = AdmissionController(
+    max_concurrency=INFERENCE_POOL_SIZE,
+    max_queue=INFERENCE_QUEUE_DEPTH,
+    deadline=INFERENCE_DEADLINE_MS / 1000 if INFERENCE_DEADLINE_MS > 0 else None,
+)
+executor = InferenceExecutor(
+    INFERENCE_BACKEND,
+    pool_size=INFERENCE_POOL_SIZE,
+    queue_depth=INFERENCE_QUEUE_DEPTH,
+    initializer=load_worker_model,
+    observer=observe_inference,
+    admission=admission,
+)
+batcher = MicroBatcher(
+    get_batch_prediction,
+    max_batch_size=MICRO_BATCH_MAX_SIZE,
+    max_wait_ms=MICRO_BATCH_WAIT_MS,
+    executor=executor,
+)
+
+log_writer = RequestLogWriter(
+    lambda: SessionLocal(),
+    max_queue_size=REQUEST_LOG_QUEUE_SIZE,
+    batch_size=REQUEST_LOG_BATCH_SIZE,
+    flush_interval=REQUEST_LOG_FLUSH_INTERVAL,
+    overflow=REQUEST_LOG_OVERFLOW,
+    log_format=REQUEST_LOG_FORMAT,
+    async_session_factory=AsyncSessionLocal,
+)
+
+prediction_cache = PredictionCache(
+    max_size=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL
+)
+coalescer = SingleFlight()
+shadow = ShadowEvaluator(
+    lambda data_points: model.predict_shadow(data_points),
+    max_queue_rows=SHADOW_QUEUE_ROWS,
+    batch_size=SHADOW_BATCH_SIZE,
+    flush_interval=SHADOW_FLUSH_INTERVAL,
+    busy_fn=lambda: executor.queued() > 0,
+)
+
+metrics.gauge(
+    "inference_queue_depth",
+    "Model calls waiting for an inference worker.",
+    fn=lambda: executor.queued(),
+)
+metrics.gauge(
+    "inference_in_flight",
+    "Model calls queued or running.",
+    fn=lambda: executor.pending,
+)
+metrics.counter(
+    "inference_shed_total",
+    "Model calls refused with 503 because the wait would be too long.",
+    fn=lambda: admission.shed,
+)
+metrics.gauge(
+    "prediction_cache_hit_ratio",
+    "Share of cache lookups served from the prediction cache.",
+    fn=lambda: prediction_cache.stats()["hit_ratio"],
+)
+metrics.counter(
+    "prediction_cache_hits_total",
+    "Predictions served from the cache.",
+    fn=lambda: prediction_cache.hits,
+)
+metrics.counter(
+    "prediction_cache_misses_total",
+    "Cache lookups that had to run the model.",
+    fn=lambda: prediction_cache.misses,
+)
+metrics.counter(
+    "prediction_coalesced_total",
+    "Predictions that shared an identical in-flight model call.",
+    fn=lambda: coalescer.coalesced,
+)
+metrics.gauge(
+    "shadow_agreement_ratio",
+    "Share of shadow model predictions agreeing with the main model.",
+    fn=lambda: shadow.stats()["agreement_rate"],
+)
+metrics.counter(
+    "shadow_shed_total",
+    "Rows dropped instead of being scored by the shadow model.",
+    fn=lambda: shadow.shed,
+)
+metrics.gauge(
+    "request_log_queued",
+    "Request log rows waiting to be written.",
+    fn=lambda: len(log_writer.queue),
+)
+metrics.gauge(
+    "model_load_seconds",
+    "Time preload_model took to load the model at startup.",
+    fn=lambda: model_load_stats.get("seconds"),
+)
+metrics.gauge(
+    "model_reload_seconds",
+    "Time the last model reload took.",
+    fn=lambda: model.reload_seconds,
+)
+
+health_monitor = HealthMonitor(
+    lambda data_point: get_prediction(data_point),
+    interval=HEALTH_CHECK_INTERVAL,
+    retry_interval=HEALTH_RETRY_INTERVAL,
+    admission=admission,
+)
+
+
+def overloaded(err):
+    return HTTPException(
+        status_code=503,
+        detail=str(err),
+        headers={"Retry-After": str(err.retry_after)},
+    )
 
 
 def get_prediction_label(prediction):
@@ -28,22 +241,94 @@ def get_prediction_label(prediction):
     return "label nok"
 
 
+async def score(data_point, version=None):
+    started = time.perf_counter()
+    if version is not None:
+        prediction = await executor.run(
+            partial(get_version_prediction, version), data_point
+        )
+    elif MICRO_BATCHING_FLAG:
+        prediction = await batcher.submit(data_point)
+    else:
+        prediction = await executor.run(get_prediction, data_point)
+    registry.record(version, time.perf_counter() - started)
+    compare_shadow(data_point, prediction, version)
+    try:
+        return float(prediction[0])
+    except (TypeError, IndexError, KeyError):
+        return float(prediction)
+
+
+async def score_rows(data_points, version=None):
+    started = time.perf_counter()
+    if version is None:
+        predictions = await executor.run(get_prediction, data_points)
+    else:
+        predictions = await executor.run(
+            partial(get_version_prediction, version), data_points
+        )
+    registry.record(version, time.perf_counter() - started)
+    predictions = np.ravel(np.asarray(predictions, dtype=float))
+    if len(predictions) != len(data_points):
+        raise ValueError(
+            f"model returned {len(predictions)} predictions "
+            f"for {len(data_points)} rows"
+        )
+    compare_shadow(data_points, predictions, version)
+    return predictions
+
+
+def compare_shadow(data_points, predictions, version):
+    if version is None and model.shadow_model is not None:
+        shadow.enqueue(data_points, predictions)
+
+
+def log_requests(pairs, version=None):
+    if not REQUEST_LOG_FLAG:
+        return
+    started = time.perf_counter()
+    version = version or DEFAULT_VERSION
+    if REQUEST_LOG_ASYNC:
+        log_writer.enqueue(pairs, version)
+    else:
+        log_writer.write(pairs, version)
+    log_stage.observe(time.perf_counter() - started)
+
+
 @router.post(
     "/predict",
     response_model=MachineLearningResponse,
     name="predict:get-data",
 )
-async def predict(data_input: MachineLearningDataInput):
+async def predict(
+    data_input: MachineLearningDataInput,
+    model_version: Annotated[Optional[str], Query(alias="model")] = None,
+):
+    observe_parse()
     if not data_input:
         raise HTTPException(status_code=404, detail="'data_input' argument invalid!")
     try:
-        data_point = data_input.get_np_array()
-        prediction = await run_in_threadpool(get_prediction, data_point)
-        try:
-            prediction = float(prediction[0])
-        except (TypeError, IndexError, KeyError):
-            prediction = float(prediction)
+        version = registry.resolve(model_version)
+        use_cache = PREDICTION_CACHE_FLAG and version is None
+        features = data_input.get_features()
+        prediction = None
+        # results are cached under the model that scored them
+        current = model.model
+        if use_cache:
+            prediction = prediction_cache.get(features, current)
+        if prediction is None:
+            scorer = partial(score, data_input.get_np_array(), version)
+            if PREDICTION_COALESCE_FLAG:
+                prediction = await coalescer.run((version, features), scorer)
+            else:
+                prediction = await scorer()
+            if use_cache:
+                prediction_cache.set(features, prediction, current)
         prediction_label = get_prediction_label(prediction)
+    except ModelNotFoundException as err:
+        raise HTTPException(status_code=404, detail=str(err)) from err
+    except Overloaded as err:
+        raise overloaded(err) from err
     except Exception as err:
         raise HTTPException(status_code=500, detail=f"Exception: {err}") from err
 
@@ -51,32 +336,217 @@ async def predict(data_input: MachineLearningDataInput):
         prediction=prediction, prediction_label=prediction_label
     )
 
+    log_requests([(data_input, response)], version)
+
+    return response
+
+
+@router.post(
+    "/predict/batch",
+    response_model=MachineLearningBatchResponse,
+    name="predict:get-batch",
+)
+async def predict_batch(
+    data_inputs: List[MachineLearningDataInput],
+    model_version: Annotated[Optional[str], Query(alias="model")] = None,
+):
+    observe_parse()
+    if not data_inputs:
+        raise HTTPException(status_code=404, detail="'data_inputs' argument invalid!")
+    if len(data_inputs) > BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(data_inputs)} rows exceeds {BATCH_MAX_SIZE}",
+        )
+    try:
+        version = registry.resolve(model_version)
+        data_points = MachineLearningDataInput.get_np_array_batch(data_inputs)
+        predictions = await score_rows(data_points, version)
+    except ModelNotFoundException as err:
+        raise HTTPException(status_code=404, detail=str(err)) from err
+    except Overloaded as err:
+        raise overloaded(err) from err
+    except Exception as err:
+        raise HTTPException(status_code=500, detail=f"Exception: {err}") from err
+
+    responses = [
+        MachineLearningResponse(
+            prediction=prediction, prediction_label=get_prediction_label(prediction)
+        )
+        for prediction in predictions.tolist()
+    ]
+    log_requests(zip(data_inputs, responses), version)
+
+    return MachineLearningBatchResponse(predictions=responses)
+
+
+@router.post(
+    "/predict/fast",
+    response_class=Response,
+    name="predict:get-fast",
+)
+async def predict_fast(
+    request: Request,
+    model_version: Annotated[Optional[str], Query(alias="model")] = None,
+):
+    """Same payloads as ``/predict`` and ``/predict/batch`` without pydantic.
+
+    The body is decoded straight into a float array and the response is
+    written with a fast JSON encoder.
+    """
     try:
-        with SessionLocal() as db:
-            db.add(
-                RequestLog(
-                    request=json.dumps(data_input.model_dump()),
-                    response=json.dumps(response.model_dump()),
+        data_points, rows, single = decode_rows(await request.body())
+    except DecodeError as err:
+        raise HTTPException(status_code=422, detail=str(err)) from err
+    observe_parse()
+    if not rows:
+        raise HTTPException(status_code=404, detail="'data_inputs' argument invalid!")
+    if len(rows) > BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(rows)} rows exceeds {BATCH_MAX_SIZE}",
+        )
+    try:
+        version = registry.resolve(model_version)
+        predictions = await score_rows(data_points, version)
+    except ModelNotFoundException as err:
+        raise HTTPException(status_code=404, detail=str(err)) from err
+    except Overloaded as err:
+        raise overloaded(err) from err
+    except Exception as err:
+        raise HTTPException(status_code=500, detail=f"Exception: {err}") from err
+
+    responses = [
+        {"prediction": prediction, "prediction_label": get_prediction_label(prediction)}
+        for prediction in predictions.tolist()
+    ]
+    log_requests(zip(rows, responses), version)
+
+    payload = responses[0] if single else {"predictions": responses}
+    return Response(content=dumps(payload), media_type="application/json")
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """``StreamingResponse`` that leaves ``receive`` to the request body.
+
+    Starlette listens for a client disconnect while streaming, which eats
+    the body messages a generator reading ``request.stream()`` still needs.
+    Here a disconnect surfaces as ``ClientDisconnect`` from the body instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+@router.post(
+    "/predict/stream",
+    response_class=BodyStreamingResponse,
+    name="predict:get-stream",
+)
+async def predict_stream(
+    request: Request,
+    model_version: Annotated[Optional[str], Query(alias="model")] = None,
+    stream_format: Annotated[Optional[str], Query(alias="format")] = None,
+):
+    """Score a CSV or NDJSON upload of any size, answering with NDJSON.
+
+    The body is read in chunks of ``STREAM_CHUNK_ROWS`` lines, each scored
+    with one model call and written out before the next one is read. The
+    format comes from ``?format=`` or the content type. Once streaming has
+    started errors can no longer change the status code, so they end the
+    stream with an ``{"error": ..., "row": ...}`` line. Bulk uploads are not
+    written to the request log.
+    """
+    if stream_format is None:
+        content_type = request.headers.get("content-type", "")
+        stream_format = "csv" if "csv" in content_type else "ndjson"
+    try:
+        decoder = StreamDecoder(stream_format)
+        version = registry.resolve(model_version)
+    except DecodeError as err:
+        raise HTTPException(status_code=422, detail=str(err)) from err
+    except ModelNotFoundException as err:
+        raise HTTPException(status_code=404, detail=str(err)) from err
+
+    async def results():
+        row = 0
+        chunks = iter_line_chunks(
+            request.stream(), STREAM_CHUNK_ROWS, STREAM_MAX_LINE_BYTES
+        )
+        try:
+            async for lines in chunks:
+                data_points = decoder.decode(lines)
+                if not len(data_points):
+                    continue
+                predictions = await score_rows(data_points, version)
+                yield b"".join(
+                    dumps(
+                        {
+                            "prediction": prediction,
+                            "prediction_label": get_prediction_label(prediction),
+                        }
+                    )
+                    + b"\n"
+                    for prediction in predictions.tolist()
                 )
-            )
-            db.commit()
-    except Exception:
-        logger.exception("failed to log request")
+                row += len(data_points)
+        except ClientDisconnect:
+            return
+        except (Exception, ModelNotFoundException) as err:
+            yield dumps({"error": str(err), "row": row}) + b"\n"
 
-    return response
+    return BodyStreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@router.get(
+    "/batcher/stats",
+    response_model=BatcherStatsResponse,
+    name="batcher:get-stats",
+)
+async def batcher_stats():
+    return BatcherStatsResponse(enabled=MICRO_BATCHING_FLAG, **batcher.stats())
+
+
+@router.get(
+    "/cache/stats",
+    response_model=CacheStatsResponse,
+    name="cache:get-stats",
+)
+async def cache_stats():
+    return CacheStatsResponse(enabled=PREDICTION_CACHE_FLAG, **prediction_cache.stats())
 
 
+@router.get(
+    "/coalescer/stats",
+    response_model=CoalescerStatsResponse,
+    name="coalescer:get-stats",
+)
+async def coalescer_stats():
+    return CoalescerStatsResponse(enabled=PREDICTION_COALESCE_FLAG, **coalescer.stats())
+
+
+@router.get(
+    "/health/live",
+    response_model=HealthResponse,
+    name="health:get-live",
+)
+async def liveness():
+    return HealthResponse(status=True)
+
+
+@router.get(
+    "/health/ready",
+    response_model=HealthResponse,
+    name="health:get-ready",
+)
 @router.get(
     "/health",
     response_model=HealthResponse,
     name="health:get-data",
 )
 async def health():
-    try:
-        content = await run_in_threadpool(Path(INPUT_EXAMPLE).read_text)
-        test_input = MachineLearningDataInput(**json.loads(content))
-        test_point = test_input.get_np_array()
-        await run_in_threadpool(get_prediction, test_point)
-        return HealthResponse(status=True)
-    except Exception:
+    if not await health_monitor.is_ready(INPUT_EXAMPLE):
         raise HTTPException(status_code=404, detail="Unhealthy")
+    return HealthResponse(status=True)
@@ -16,8 +16,13 @@ MIN_CONNECTIONS_COUNT: int = config("MIN_CONNECTIONS_COUNT", cast=int, default=1
 SECRET_KEY: Secret = config("SECRET_KEY", cast=Secret, default="")
 MEMOIZATION_FLAG: bool = config("MEMOIZATION_FLAG", cast=bool, default=True)
 DATABASE_URL: str = config("DATABASE_URL", default="sqlite:///./app.db")
+# async driver sessions (aiosqlite / asyncpg) for request handlers
+DATABASE_ASYNC: bool = config("DATABASE_ASYNC", cast=bool, default=False)
+DATABASE_POOL_TIMEOUT: float = config("DATABASE_POOL_TIMEOUT", cast=float, default=30.0)
+DATABASE_POOL_RECYCLE: int = config("DATABASE_POOL_RECYCLE", cast=int, default=1800)
 
 PROJECT_NAME: str = config("PROJECT_NAME", default="basic_fastapi")
+METRICS_FLAG: bool = config("METRICS_FLAG", cast=bool, default=True)
 
 # logging configuration
 LOGGING_LEVEL = logging.DEBUG if DEBUG else logging.INFO
@@ -28,4 +33,86 @@ logger.configure(handlers=[{"sink": sys.stderr, "level": LOGGING_LEVEL}])
 
 MODEL_PATH = config("MODEL_PATH", default="./ml/model/")
 MODEL_NAME = config("MODEL_NAME", default="model.pkl")
+# "r" or "c" to memory-map model arrays shared across workers, empty to disable
+MODEL_MMAP_MODE: str = config("MODEL_MMAP_MODE", default="")
+# flatten tree ensembles into numpy arrays at load, other models load as is.
+# The compiled arrays are private copies, not shared through MODEL_MMAP_MODE
+MODEL_COMPILE_FLAG: bool = config("MODEL_COMPILE_FLAG", cast=bool, default=False)
+# larger batches go to the original estimator, see benchmarks/bench_trees.py
+MODEL_COMPILE_MAX_ROWS: int = config("MODEL_COMPILE_MAX_ROWS", cast=int, default=1024)
+# seconds between checks of the model file for changes, 0 to disable
+MODEL_WATCH_INTERVAL: float = config("MODEL_WATCH_INTERVAL", cast=float, default=10.0)
+# model registry, versions live in MODEL_PATH/<version>/MODEL_NAME
+MODEL_REGISTRY_MEMORY_MB: int = config(
+    "MODEL_REGISTRY_MEMORY_MB", cast=int, default=1024
+)
+# weighted split for requests without ?model=, e.g. "default:90,v2:10"
+MODEL_TRAFFIC_SPLIT: str = config("MODEL_TRAFFIC_SPLIT", default="")
 INPUT_EXAMPLE = config("INPUT_EXAMPLE", default="./ml/model/examples/example.json")
+HEALTH_CHECK_INTERVAL: float = config("HEALTH_CHECK_INTERVAL", cast=float, default=30.0)
+HEALTH_RETRY_INTERVAL: float = config("HEALTH_RETRY_INTERVAL", cast=float, default=2.0)
+# score synthetic INPUT_EXAMPLE rows on every execution path before readiness
+WARMUP_FLAG: bool = config("WARMUP_FLAG", cast=bool, default=True)
+WARMUP_ROUNDS: int = config("WARMUP_ROUNDS", cast=int, default=3)
+WARMUP_BATCH_ROWS: int = config("WARMUP_BATCH_ROWS", cast=int, default=64)
+BATCH_MAX_SIZE: int = config("BATCH_MAX_SIZE", cast=int, default=10000)
+STREAM_CHUNK_ROWS: int = config("STREAM_CHUNK_ROWS", cast=int, default=10000)
+STREAM_MAX_LINE_BYTES: int = config("STREAM_MAX_LINE_BYTES", cast=int, default=65536)
+
+# request log read path
+LOGS_PAGE_SIZE: int = config("LOGS_PAGE_SIZE", cast=int, default=50)
+LOGS_PAGE_MAX_SIZE: int = config("LOGS_PAGE_MAX_SIZE", cast=int, default=1000)
+PAGINATION_COUNT_TTL: float = config("PAGINATION_COUNT_TTL", cast=float, default=30.0)
+
+# inference execution backend: inline, thread or process
+INFERENCE_BACKEND: str = config("INFERENCE_BACKEND", default="thread")
+INFERENCE_POOL_SIZE: int = config("INFERENCE_POOL_SIZE", cast=int, default=4)
+INFERENCE_QUEUE_DEPTH: int = config("INFERENCE_QUEUE_DEPTH", cast=int, default=64)
+# answer 503 when a model call would wait longer for a worker, 0 to disable
+INFERENCE_DEADLINE_MS: float = config(
+    "INFERENCE_DEADLINE_MS", cast=float, default=1000.0
+)
+
+# micro-batching of concurrent /predict calls
+MICRO_BATCHING_FLAG: bool = config("MICRO_BATCHING_FLAG", cast=bool, default=False)
+MICRO_BATCH_MAX_SIZE: int = config("MICRO_BATCH_MAX_SIZE", cast=int, default=32)
+MICRO_BATCH_WAIT_MS: float = config("MICRO_BATCH_WAIT_MS", cast=float, default=2.0)
+
+# share one model call between identical concurrent /predict inputs
+PREDICTION_COALESCE_FLAG: bool = config(
+    "PREDICTION_COALESCE_FLAG", cast=bool, default=True
+)
+
+# shadow model scored off the request path, a version in MODEL_PATH/<version>/
+SHADOW_MODEL_VERSION: str = config("SHADOW_MODEL_VERSION", default="")
+SHADOW_QUEUE_ROWS: int = config("SHADOW_QUEUE_ROWS", cast=int, default=10000)
+SHADOW_BATCH_SIZE: int = config("SHADOW_BATCH_SIZE", cast=int, default=256)
+SHADOW_FLUSH_INTERVAL: float = config("SHADOW_FLUSH_INTERVAL", cast=float, default=0.5)
+
+# prediction result cache
+PREDICTION_CACHE_FLAG: bool = config("PREDICTION_CACHE_FLAG", cast=bool, default=False)
+PREDICTION_CACHE_SIZE: int = config("PREDICTION_CACHE_SIZE", cast=int, default=10000)
+PREDICTION_CACHE_TTL: float = config("PREDICTION_CACHE_TTL", cast=float, default=300.0)
+
+# request log pipeline
+REQUEST_LOG_FLAG: bool = config("REQUEST_LOG_FLAG", cast=bool, default=True)
+REQUEST_LOG_ASYNC: bool = config("REQUEST_LOG_ASYNC", cast=bool, default=True)
+REQUEST_LOG_QUEUE_SIZE: int = config("REQUEST_LOG_QUEUE_SIZE", cast=int, default=10000)
+REQUEST_LOG_BATCH_SIZE: int = config("REQUEST_LOG_BATCH_SIZE", cast=int, default=500)
+REQUEST_LOG_FLUSH_INTERVAL: float = config(
+    "REQUEST_LOG_FLUSH_INTERVAL", cast=float, default=1.0
+)
+REQUEST_LOG_OVERFLOW: str = config("REQUEST_LOG_OVERFLOW", default="drop_newest")
+# json (request_logs), columnar (prediction_logs) or both
+REQUEST_LOG_FORMAT: str = config("REQUEST_LOG_FORMAT", default="columnar")
+
+# request log retention, older rows are archived to Parquet (needs pyarrow)
+RETENTION_FLAG: bool = config("RETENTION_FLAG", cast=bool, default=False)
+RETENTION_HOT_DAYS: float = config("RETENTION_HOT_DAYS", cast=float, default=7.0)
+# request_logs has no timestamp, keep its newest rows instead
+RETENTION_HOT_ROWS: int = config("RETENTION_HOT_ROWS", cast=int, default=1_000_000)
+RETENTION_ARCHIVE_DIR: str = config("RETENTION_ARCHIVE_DIR", default="./data/archive")
+RETENTION_BATCH_ROWS: int = config("RETENTION_BATCH_ROWS", cast=int, default=5000)
+RETENTION_INTERVAL: float = config("RETENTION_INTERVAL", cast=float, default=3600.0)
+RETENTION_PAUSE: float = config("RETENTION_PAUSE", cast=float, default=0.05)
+RETENTION_VACUUM_PAGES: int = config("RETENTION_VACUUM_PAGES", cast=int, default=1000)
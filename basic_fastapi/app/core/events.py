@@ -1,30 +1,202 @@
+import asyncio
+import time
 from typing import Callable
 
-import joblib
+import numpy as np
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from loguru import logger
 from sqlalchemy.exc import OperationalError
 
-from core.config import MEMOIZATION_FLAG
+from core.config import (
+    MEMOIZATION_FLAG,
+    MICRO_BATCH_MAX_SIZE,
+    MICRO_BATCHING_FLAG,
+    MODEL_MMAP_MODE,
+    RETENTION_FLAG,
+    SHADOW_MODEL_VERSION,
+    WARMUP_BATCH_ROWS,
+    WARMUP_FLAG,
+    WARMUP_ROUNDS,
+)
+from core.errors import ModelLoadException, ModelNotFoundException, PredictException
+from core.memory import memory_usage
 from db import Base, engine
 
+model_load_stats = {}
+startup_report = {}
+warmup_report = {}
+warmup_task = None
+
 
 def preload_model():
     """
     In order to load model on memory to each worker
     """
-    from services.predict import MachineLearningModelHandlerScore
+    from services.predict import MachineLearningModelHandlerScore, get_load_wrapper
+
+    before = memory_usage()
+    started = time.perf_counter()
+    MachineLearningModelHandlerScore.get_model(get_load_wrapper())
+    seconds = time.perf_counter() - started
+    after = memory_usage()
+    model_load_stats.update(
+        seconds=seconds,
+        mmap_mode=MODEL_MMAP_MODE or None,
+        rss_before_bytes=before["rss_bytes"],
+        rss_after_bytes=after["rss_bytes"],
+        shared_after_bytes=after["shared_bytes"],
+    )
+    mib = {
+        key: value / 2**20 for key, value in model_load_stats.items() if "bytes" in key
+    }
+    logger.info(
+        f"model loaded in {seconds:.3f}s (mmap_mode={MODEL_MMAP_MODE or None}), "
+        f"rss {mib['rss_before_bytes']:.1f} -> {mib['rss_after_bytes']:.1f} MiB, "
+        f"shared {mib['shared_after_bytes']:.1f} MiB"
+    )
+
+
+def init_db():
+    try:
+        Base.metadata.create_all(bind=engine)
+    except OperationalError:
+        logger.exception("failed to initialize database")
+
+
+async def timed_phase(name, coroutine):
+    """Await ``coroutine`` and record its duration in ``startup_report``."""
+    started = time.perf_counter()
+    try:
+        return await coroutine
+    finally:
+        startup_report[name] = time.perf_counter() - started
 
-    MachineLearningModelHandlerScore.get_model(joblib.load)
+
+def log_startup_report():
+    phases = ", ".join(
+        f"{name} {seconds:.3f}s"
+        for name, seconds in startup_report.items()
+        if name != "total"
+    )
+    logger.info(f"startup took {startup_report['total']:.3f}s ({phases})")
+
+
+def warmup_paths(predictor, example, batch):
+    executor = predictor.executor
+    paths = {
+        # one call per worker so every thread or process pays its first call
+        "single": lambda: asyncio.gather(
+            *(
+                executor.run(predictor.get_prediction, example, priority=True)
+                for _ in range(executor.pool_size)
+            )
+        ),
+        "batch": lambda: executor.run(predictor.get_prediction, batch, priority=True),
+    }
+    if MICRO_BATCHING_FLAG:
+        rows = batch[:MICRO_BATCH_MAX_SIZE]
+        paths["micro_batch"] = lambda: asyncio.gather(
+            *(predictor.batcher.submit(row[np.newaxis]) for row in rows)
+        )
+    return paths
+
+
+async def warm_up(rounds=WARMUP_ROUNDS, batch_rows=WARMUP_BATCH_ROWS):
+    """Score synthetic rows shaped like ``INPUT_EXAMPLE`` on every path.
+
+    The first calls pay for lazy imports, allocations and worker start-up.
+    Each path is run ``rounds`` times and ``warmup_report`` keeps the first
+    and the fastest later latency, i.e. what the first real request saves.
+    """
+    from api.routes import predictor
+
+    warmup_report.clear()
+    try:
+        example = await run_in_threadpool(
+            predictor.health_monitor.load_example, predictor.INPUT_EXAMPLE
+        )
+    except Exception as err:
+        logger.warning(f"warm-up skipped, example could not be parsed: {err}")
+        return warmup_report
+    jitter = np.random.default_rng(0).uniform(0.5, 1.5, (batch_rows, example.shape[1]))
+    batch = np.repeat(example, batch_rows, axis=0) * jitter
+    for name, run in warmup_paths(predictor, example, batch).items():
+        latencies = []
+        try:
+            for _ in range(max(rounds, 2)):
+                started = time.perf_counter()
+                await run()
+                latencies.append(time.perf_counter() - started)
+        except (Exception, PredictException, ModelLoadException) as err:
+            logger.warning(f"warm-up of {name} failed: {err}")
+            continue
+        warmup_report[name] = {
+            "first_ms": latencies[0] * 1000,
+            "warm_ms": min(latencies[1:]) * 1000,
+        }
+    logger.info(
+        "warm-up done: "
+        + ", ".join(
+            f"{name} {stats['first_ms']:.2f} -> {stats['warm_ms']:.2f} ms"
+            for name, stats in warmup_report.items()
+        )
+    )
+    return warmup_report
 
 
 def create_start_app_handler(app: FastAPI) -> Callable:
-    def start_app() -> None:
+    async def start_app() -> None:
+        global warmup_task
+        from api.routes.admin import model_watcher, register_shadow
+        from api.routes.logs import log_retention
+        from api.routes.predictor import INPUT_EXAMPLE, health_monitor
+
+        started = time.perf_counter()
+        startup_report.clear()
+        # loading the model and creating tables both wait on disk, run them
+        # side by side on the threadpool
+        phases = [timed_phase("database", run_in_threadpool(init_db))]
         if MEMOIZATION_FLAG:
-            preload_model()
-        try:
-            Base.metadata.create_all(bind=engine)
-        except OperationalError:
-            logger.exception("failed to initialize database")
+            phases.append(timed_phase("model", run_in_threadpool(preload_model)))
+        await asyncio.gather(*phases)
+        if SHADOW_MODEL_VERSION:
+            try:
+                await timed_phase("shadow", register_shadow(SHADOW_MODEL_VERSION))
+            except (Exception, ModelLoadException, ModelNotFoundException):
+                logger.exception("failed to load the shadow model")
+        # readiness stays false until the warm-up is done
+        warmup_task = asyncio.ensure_future(warm_up()) if WARMUP_FLAG else None
+        await timed_phase("health", health_monitor.start(INPUT_EXAMPLE, warmup_task))
+        await timed_phase("watcher", model_watcher.start())
+        if RETENTION_FLAG:
+            await timed_phase("retention", log_retention.start())
+        startup_report["total"] = time.perf_counter() - started
+        log_startup_report()
 
     return start_app
+
+
+def create_stop_app_handler(app: FastAPI) -> Callable:
+    async def stop_app() -> None:
+        from api.routes.admin import model_watcher
+        from api.routes.logs import log_retention
+        from api.routes.predictor import (
+            batcher,
+            executor,
+            health_monitor,
+            log_writer,
+            shadow,
+        )
+
+        if warmup_task is not None:
+            warmup_task.cancel()
+        await model_watcher.stop()
+        await log_retention.stop()
+        await batcher.stop()
+        await shadow.stop()
+        await health_monitor.stop()
+        await log_writer.stop()
+        executor.shutdown()
+
+    return stop_app
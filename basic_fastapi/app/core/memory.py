@@ -0,0 +1,22 @@
+import os
+import resource
+
+
+def memory_usage():
+    """Resident and shared memory of the current process, in bytes.
+
+    Pages of a memory-mapped model count as shared, so ``rss - shared`` is
+    what each extra worker really costs. Falls back to the peak RSS where
+    ``/proc`` is not available.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            _, resident, shared = statm.read().split()[:3]
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        return {
+            "rss_bytes": int(resident) * page_size,
+            "shared_bytes": int(shared) * page_size,
+        }
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"rss_bytes": peak * 1024, "shared_bytes": 0}
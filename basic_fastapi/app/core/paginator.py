@@ -1,3 +1,11 @@
+import base64
+import json
+import threading
+import time
+
+from sqlalchemy import func, select
+
+
 def pagenation(
     page_number=1, page_size=20, total_count=0, data=None, start_page_as_1=True
 ):
@@ -33,3 +41,81 @@ def pagenation(
         "totalCount": total_count,
         "listings": data[begin:end],
     }
+
+
+class InvalidCursor(ValueError): ...
+
+
+def encode_cursor(value):
+    """Turn the last key of a page into an opaque, URL-safe cursor."""
+    return base64.urlsafe_b64encode(json.dumps({"k": value}).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        value = json.loads(base64.urlsafe_b64decode(cursor.encode()))["k"]
+    except (ValueError, TypeError, KeyError) as err:
+        raise InvalidCursor(f"invalid cursor '{cursor}'") from err
+    if type(value) not in (int, str):
+        raise InvalidCursor(f"invalid cursor '{cursor}'")
+    return value
+
+
+class CountCache(object):
+    """Remember ``COUNT(*)`` results for ``ttl`` seconds per query key."""
+
+    def __init__(self, ttl=30.0, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, count):
+        now = self.clock()
+        with self._lock:
+            cached = self._counts.get(key)
+            if cached is not None and now - cached[1] < self.ttl:
+                return cached[0]
+        value = count()
+        with self._lock:
+            self._counts[key] = (value, now)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+def keyset_page(db, statement, key, limit=20, cursor=None, count_cache=None):
+    """Fetch one page of ``statement`` ordered by the unique column ``key``.
+
+    ``LIMIT`` and ``WHERE key > :cursor`` are pushed into the query so only
+    the rows of the requested page are read, however deep it is. The total
+    count is served from ``count_cache`` when given, keyed on the unfiltered
+    SQL, instead of counting on every page.
+    """
+    if limit <= 0:
+        raise ValueError("limit must be > 0")
+    page = statement.order_by(key).limit(limit + 1)
+    if cursor is not None:
+        after = decode_cursor(cursor)
+        if type(after) is not key.type.python_type:
+            raise InvalidCursor(f"invalid cursor '{cursor}'")
+        page = page.where(key > after)
+    rows = db.execute(page).scalars().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    def count():
+        return db.scalar(select(func.count()).select_from(statement.subquery()))
+
+    if count_cache is None:
+        total_count = count()
+    else:
+        total_count = count_cache.get(str(statement), count)
+    return {
+        "listings": rows,
+        "next_cursor": encode_cursor(getattr(rows[-1], key.key)) if has_more else None,
+        "pageSize": limit,
+        "totalCount": total_count,
+    }
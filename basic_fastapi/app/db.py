@@ -1,8 +1,104 @@
-from sqlalchemy import create_engine
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-from core.config import DATABASE_URL
+from core.config import (
+    DATABASE_ASYNC,
+    DATABASE_POOL_RECYCLE,
+    DATABASE_POOL_TIMEOUT,
+    DATABASE_URL,
+    MAX_CONNECTIONS_COUNT,
+    MIN_CONNECTIONS_COUNT,
+)
 
-engine = create_engine(DATABASE_URL)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def is_sqlite_memory(url):
+    return url.startswith("sqlite") and (url.endswith("://") or ":memory:" in url)
+
+
+def engine_options(url):
+    """Pool settings for ``url``, SQLite in-memory databases keep the defaults.
+
+    ``MIN_CONNECTIONS_COUNT`` connections stay open and up to
+    ``MAX_CONNECTIONS_COUNT`` are allowed under load.
+    """
+    options = {"pool_pre_ping": True}
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+    if not is_sqlite_memory(url):
+        options.update(
+            pool_size=MIN_CONNECTIONS_COUNT,
+            max_overflow=max(MAX_CONNECTIONS_COUNT - MIN_CONNECTIONS_COUNT, 0),
+            pool_timeout=DATABASE_POOL_TIMEOUT,
+            pool_recycle=DATABASE_POOL_RECYCLE,
+        )
+    return options
+
+
+def async_url(url):
+    scheme, separator, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + separator + rest
+
+
+def enable_sqlite_wal(engine):
+    """Let readers and the log writer work concurrently on a SQLite file.
+
+    New files are also created with incremental auto-vacuum, so the log
+    retention job can hand space back after deleting archived rows.
+    """
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(connection, record):
+        cursor = connection.cursor()
+        # only takes effect before the first table is created
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
+
+def create_engines(url, use_async=False):
+    engine = create_engine(url, **engine_options(url))
+    async_engine = None
+    if use_async:
+        async_engine = create_async_engine(async_url(url), **engine_options(url))
+    if url.startswith("sqlite") and not is_sqlite_memory(url):
+        enable_sqlite_wal(engine)
+        if async_engine is not None:
+            enable_sqlite_wal(async_engine.sync_engine)
+    return engine, async_engine
+
+
+async def run_session(session_factory, fn, *args):
+    """Run ``fn(session, *args)`` without blocking the event loop.
+
+    An ``async_sessionmaker`` runs it on the async driver's connection,
+    a plain ``sessionmaker`` runs it on the threadpool.
+    """
+    if isinstance(session_factory, async_sessionmaker):
+        async with session_factory() as db:
+            return await db.run_sync(fn, *args)
+
+    def call():
+        with session_factory() as db:
+            return fn(db, *args)
+
+    return await run_in_threadpool(call)
+
+
+engine, async_engine = create_engines(DATABASE_URL, DATABASE_ASYNC)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    if async_engine is not None
+    else None
+)
 Base = declarative_base()
@@ -1,13 +1,24 @@
 from api.routes.api import router as api_router
-from core.config import API_PREFIX, DEBUG, MEMOIZATION_FLAG, PROJECT_NAME, VERSION
-from core.events import create_start_app_handler
+from core.config import (
+    API_PREFIX,
+    DEBUG,
+    MEMOIZATION_FLAG,
+    METRICS_FLAG,
+    PROJECT_NAME,
+    VERSION,
+)
+from core.events import create_start_app_handler, create_stop_app_handler
 from fastapi import FastAPI
+from services.metrics import MetricsMiddleware
 
 
 def get_application() -> FastAPI:
     application = FastAPI(title=PROJECT_NAME, debug=DEBUG, version=VERSION)
     application.include_router(api_router, prefix=API_PREFIX)
+    if METRICS_FLAG:
+        application.add_middleware(MetricsMiddleware)
     application.add_event_handler("startup", create_start_app_handler(application))
+    application.add_event_handler("shutdown", create_stop_app_handler(application))
     return application
 
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text
+from sqlalchemy import BigInteger, Column, Float, Index, Integer, String, Text
 
 from db import Base
 
@@ -9,3 +9,29 @@ class RequestLog(Base):
     id = Column(Integer, primary_key=True, index=True)
     request = Column(Text, nullable=False)
     response = Column(Text, nullable=False)
+
+    # archived rows are deleted, their ids must not be handed out again
+    __table_args__ = {"sqlite_autoincrement": True}
+
+
+class PredictionLog(Base):
+    """One row per prediction with a column per feature, for SQL analytics."""
+
+    __tablename__ = "prediction_logs"
+
+    id = Column(Integer, primary_key=True)
+    created_ms = Column(BigInteger, nullable=False)
+    model_version = Column(String(64), nullable=False)
+    feature1 = Column(Float, nullable=False)
+    feature2 = Column(Float, nullable=False)
+    feature3 = Column(Float, nullable=False)
+    feature4 = Column(Float, nullable=False)
+    feature5 = Column(Float, nullable=False)
+    prediction = Column(Float, nullable=False)
+    label = Column(String(16), nullable=False)
+
+    __table_args__ = (
+        Index("ix_prediction_logs_created_ms", "created_ms"),
+        Index("ix_prediction_logs_label_created_ms", "label", "created_ms"),
+        {"sqlite_autoincrement": True},
+    )
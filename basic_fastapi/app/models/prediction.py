@@ -1,3 +1,5 @@
+from typing import Any, Dict, List, Optional
+
 import numpy as np
 
 from pydantic import BaseModel
@@ -8,6 +10,117 @@ class MachineLearningResponse(BaseModel):
     prediction_label: str
 
 
+class MachineLearningBatchResponse(BaseModel):
+    predictions: List[MachineLearningResponse]
+
+
+class BatcherStatsResponse(BaseModel):
+    enabled: bool
+    requests: int
+    batches: int
+    batch_size_mean: float
+    batch_size_max: int
+    latency_p50_ms: float
+    latency_p99_ms: float
+
+
+class CacheStatsResponse(BaseModel):
+    enabled: bool
+    size: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    hit_ratio: float
+
+
+class CoalescerStatsResponse(BaseModel):
+    enabled: bool
+    in_flight: int
+    calls: int
+    coalesced: int
+    coalesced_ratio: float
+
+
+class ShadowStatsResponse(BaseModel):
+    version: Optional[str]
+    queued_rows: int
+    compared: int
+    agreed: int
+    agreement_rate: float
+    mean_abs_diff: float
+    batches: int
+    shed: int
+    failed: int
+    latency_p50_ms: float
+    latency_p99_ms: float
+
+
+class ModelInfoResponse(BaseModel):
+    version: Optional[str]
+    loaded_at: Optional[float]
+    reload_seconds: Optional[float]
+
+
+class ModelVersionStats(BaseModel):
+    loaded: bool
+    size_bytes: int
+    requests: int
+    latency_p50_ms: float
+    latency_p99_ms: float
+
+
+class ModelRegistryResponse(BaseModel):
+    loads: int
+    evictions: int
+    traffic_split: Dict[str, float]
+    versions: Dict[str, ModelVersionStats]
+
+
+class RequestLogEntry(BaseModel):
+    id: int
+    request: Dict[str, Any]
+    response: Dict[str, Any]
+
+
+class RequestLogPage(BaseModel):
+    listings: List[RequestLogEntry]
+    next_cursor: Optional[str]
+    page_size: int
+    total_count: int
+
+
+class LabelCount(BaseModel):
+    window_start: float
+    label: str
+    count: int
+
+
+class LabelCountsResponse(BaseModel):
+    window_seconds: int
+    counts: List[LabelCount]
+
+
+class FeatureStats(BaseModel):
+    mean: Optional[float]
+    variance: Optional[float]
+
+
+class FeatureStatsResponse(BaseModel):
+    count: int
+    features: Dict[str, FeatureStats]
+
+
+class RetentionStatsResponse(BaseModel):
+    enabled: bool
+    running: bool
+    runs: int
+    postponed: int
+    archived: int
+    files: int
+    last_run_at: Optional[float]
+
+
 class HealthResponse(BaseModel):
     status: bool
 
@@ -19,15 +132,19 @@ class MachineLearningDataInput(BaseModel):
     feature4: float
     feature5: float
 
-    def get_np_array(self):
-        return np.array(
-            [
-                [
-                    self.feature1,
-                    self.feature2,
-                    self.feature3,
-                    self.feature4,
-                    self.feature5,
-                ]
-            ]
+    def get_features(self):
+        return (
+            self.feature1,
+            self.feature2,
+            self.feature3,
+            self.feature4,
+            self.feature5,
         )
+
+    def get_np_array(self):
+        return np.array([self.get_features()])
+
+    @staticmethod
+    def get_np_array_batch(data_inputs):
+        """Stack many inputs into one 2-D array, one row per input."""
+        return np.array([data_input.get_features() for data_input in data_inputs])
@@ -0,0 +1,129 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+
+class Overloaded(Exception):
+    """Raised instead of queueing a call that could not run in time."""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController(object):
+    """Bounded concurrency limiter that sheds load instead of queueing it.
+
+    At most ``max_concurrency`` calls hold a slot, up to ``max_queue`` more
+    wait for one in arrival order. A call is refused with ``Overloaded``
+    when the queue is full, when the wait estimated from the recent service
+    time exceeds ``deadline`` seconds, or when it actually waited that long.
+    Priority calls (health checks) are served before queued calls and are
+    never refused. Meant to be used from the event loop only, it does no
+    locking and starts over when it finds itself on a new loop.
+    """
+
+    def __init__(
+        self, max_concurrency=4, max_queue=64, deadline=None, clock=time.monotonic
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.deadline = deadline
+        self.clock = clock
+        self.running = 0
+        self.admitted = 0
+        self.shed = 0
+        self.timeouts = 0
+        self.service_time = None
+        self._waiting = deque()
+        self._priority = deque()
+        self._loop = None
+
+    @asynccontextmanager
+    async def admit(self, priority=False):
+        await self._acquire(priority)
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self._record(self.clock() - started)
+            self._release()
+
+    def waiting(self):
+        return len(self._waiting) + len(self._priority)
+
+    def estimated_wait(self):
+        """Seconds a call arriving now would wait for a slot."""
+        if self.running < self.max_concurrency and not self.waiting():
+            return 0.0
+        rounds = len(self._waiting) // self.max_concurrency + 1
+        return rounds * (self.service_time or 0.0)
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "waiting": self.waiting(),
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "timeouts": self.timeouts,
+            "service_time_ms": (self.service_time or 0.0) * 1000,
+        }
+
+    async def _acquire(self, priority):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self.running = 0
+            self._waiting.clear()
+            self._priority.clear()
+        lane = self._priority if priority else self._waiting
+        if self.running < self.max_concurrency and not self._priority and not lane:
+            self.running += 1
+            self.admitted += 1
+            return
+        timeout = None
+        if not priority:
+            wait = self.estimated_wait()
+            if len(self._waiting) >= self.max_queue:
+                self._refuse(f"{len(self._waiting)} calls already queued", wait)
+            if self.deadline is not None:
+                if wait > self.deadline:
+                    self._refuse(f"estimated wait {wait:.3f}s over deadline", wait)
+                timeout = self.deadline
+        future = loop.create_future()
+        lane.append(future)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except BaseException as err:
+            if future.done() and not future.cancelled():
+                # the slot was handed over just as this call gave up
+                self._release()
+            elif future in lane:
+                lane.remove(future)
+            if isinstance(err, asyncio.TimeoutError):
+                self.timeouts += 1
+                self._refuse(f"waited {timeout:.3f}s for a slot", timeout)
+            raise
+        self.admitted += 1
+
+    def _release(self):
+        for lane in (self._priority, self._waiting):
+            while lane:
+                future = lane.popleft()
+                if not future.done():
+                    # the slot passes to the next call, running stays the same
+                    future.set_result(None)
+                    return
+        self.running = max(self.running - 1, 0)
+
+    def _record(self, seconds):
+        if self.service_time is None:
+            self.service_time = seconds
+        else:
+            self.service_time += 0.2 * (seconds - self.service_time)
+
+    def _refuse(self, reason, wait):
+        self.shed += 1
+        raise Overloaded(f"overloaded: {reason}", retry_after=max(1, math.ceil(wait)))
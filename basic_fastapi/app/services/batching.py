@@ -0,0 +1,125 @@
+import asyncio
+import time
+from collections import deque
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+
+class MicroBatcher(object):
+    """Coalesce concurrent single-row predictions into one model call.
+
+    Rows are collected until ``max_batch_size`` are waiting or ``max_wait_ms``
+    has passed since the first one arrived, stacked into one array, scored
+    once on ``executor`` (the threadpool by default) and the result rows
+    handed back to each caller.
+    """
+
+    def __init__(
+        self,
+        predict_fn,
+        max_batch_size=32,
+        max_wait_ms=2.0,
+        window=1024,
+        executor=None,
+    ):
+        self.predict_fn = predict_fn
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.requests = 0
+        self.batches = 0
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self._loop = None
+        self._queue = None
+        self._worker = None
+
+    async def submit(self, data_point):
+        self._ensure_worker()
+        started = time.perf_counter()
+        future = self._loop.create_future()
+        self.requests += 1
+        await self._queue.put((data_point, future))
+        try:
+            return await future
+        finally:
+            self.latencies.append(time.perf_counter() - started)
+
+    async def stop(self):
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+        self._worker = None
+
+    def stats(self):
+        latencies = np.array(self.latencies or [0.0]) * 1000
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "batch_size_mean": float(np.mean(self.batch_sizes or [0])),
+            "batch_size_max": int(max(self.batch_sizes, default=0)),
+            "latency_p50_ms": float(np.percentile(latencies, 50)),
+            "latency_p99_ms": float(np.percentile(latencies, 99)),
+        }
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def _collect(self):
+        items = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(items) < self.max_batch_size:
+            if not self._queue.empty():
+                items.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    async def _score(self, data_points):
+        if self.executor is None:
+            return await run_in_threadpool(self.predict_fn, data_points)
+        return await self.executor.run(self.predict_fn, data_points)
+
+    async def _run(self):
+        while True:
+            items = await self._collect()
+            data_points = [data_point for data_point, _ in items]
+            sizes = [len(data_point) for data_point in data_points]
+            self.batches += 1
+            self.batch_sizes.append(sum(sizes))
+            try:
+                predictions = await self._score(np.vstack(data_points))
+                predictions = np.asarray(predictions)
+            except asyncio.CancelledError:
+                for _, future in items:
+                    future.cancel()
+                raise
+            except Exception as err:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(err)
+                continue
+            offset = 0
+            for (_, future), size in zip(items, sizes):
+                if not future.done():
+                    future.set_result(predictions[offset : offset + size])
+                offset += size
@@ -0,0 +1,45 @@
+import asyncio
+from functools import partial
+
+
+class SingleFlight(object):
+    """Share one in-flight call between concurrent callers with the same key.
+
+    The first caller for a key starts ``fn()`` as a task, later callers with
+    that key await the same task until it finishes, so a burst of identical
+    inputs runs the model once. Nothing is kept after the call returns,
+    unlike ``PredictionCache`` this only covers calls that overlap. A caller
+    that is cancelled stops waiting without cancelling the shared call. Meant
+    to be used from the event loop only, it does no locking.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight = {}
+
+    async def run(self, key, fn):
+        task = self._in_flight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(partial(self._done, key))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        del self._in_flight[key]
+        if not task.cancelled():
+            # retrieved here so callers that all gave up do not warn about it
+            task.exception()
+
+    def stats(self):
+        requests = self.calls + self.coalesced
+        return {
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": self.coalesced / requests if requests else 0.0,
+        }
@@ -0,0 +1,142 @@
+import csv
+import json
+
+import numpy as np
+
+from models.prediction import MachineLearningDataInput
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+FEATURES = tuple(MachineLearningDataInput.model_fields)
+NUMBER_TYPES = (int, float)
+STREAM_FORMATS = ("csv", "ndjson")
+
+
+class DecodeError(ValueError): ...
+
+
+def loads(body):
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode()
+
+
+def _feature_values(rows):
+    for index, row in enumerate(rows):
+        if type(row) is not dict:
+            raise DecodeError(f"row {index}: expected an object")
+        for name in FEATURES:
+            value = row.get(name)
+            if type(value) not in NUMBER_TYPES:
+                raise DecodeError(f"row {index}: '{name}' must be a number")
+            yield value
+
+
+def decode_rows(body):
+    """Decode a JSON object or list of objects straight into a float array.
+
+    Skips building a pydantic model per row: feature values are type-checked
+    and streamed into one preallocated ``(rows, features)`` array. Unlike
+    ``MachineLearningDataInput`` only JSON numbers are accepted, numeric
+    strings and booleans are rejected. Returns the array, the decoded rows
+    and whether the body was a single object.
+    """
+    try:
+        rows = loads(body)
+    except ValueError as err:
+        raise DecodeError(f"invalid JSON: {err}") from err
+    single = type(rows) is dict
+    if single:
+        rows = [rows]
+    elif type(rows) is not list:
+        raise DecodeError("expected an object or a list of objects")
+    data_points = np.fromiter(
+        _feature_values(rows), dtype=np.float64, count=len(rows) * len(FEATURES)
+    )
+    return data_points.reshape(len(rows), len(FEATURES)), rows, single
+
+
+async def iter_line_chunks(byte_chunks, chunk_rows, max_line_bytes=65536):
+    """Regroup an async stream of bytes into lists of at most ``chunk_rows`` lines.
+
+    Only the current chunk and one partial line are held in memory, a line
+    longer than ``max_line_bytes`` raises ``DecodeError``.
+    """
+    partial = []
+    partial_size = 0
+    lines = []
+    async for data in byte_chunks:
+        start = 0
+        end = data.find(b"\n")
+        while end != -1:
+            line = data[start:end]
+            if partial:
+                line = b"".join(partial) + line
+                partial = []
+                partial_size = 0
+            if len(line) > max_line_bytes:
+                raise DecodeError(f"line longer than {max_line_bytes} bytes")
+            if line.strip():
+                lines.append(line)
+                if len(lines) == chunk_rows:
+                    yield lines
+                    lines = []
+            start = end + 1
+            end = data.find(b"\n", start)
+        if start < len(data):
+            partial.append(data[start:])
+            partial_size += len(data) - start
+            if partial_size > max_line_bytes:
+                raise DecodeError(f"line longer than {max_line_bytes} bytes")
+    line = b"".join(partial)
+    if line.strip():
+        lines.append(line)
+    if lines:
+        yield lines
+
+
+class StreamDecoder(object):
+    """Decode chunks of CSV or NDJSON lines into float arrays.
+
+    CSV input must start with a header naming the feature columns, they may
+    come in any order and other columns are ignored.
+    """
+
+    def __init__(self, fmt):
+        if fmt not in STREAM_FORMATS:
+            raise DecodeError(f"format must be one of {STREAM_FORMATS}")
+        self.format = fmt
+        self.columns = None
+
+    def decode(self, lines):
+        if self.format == "ndjson":
+            try:
+                rows = [loads(line) for line in lines]
+            except ValueError as err:
+                raise DecodeError(f"invalid JSON line: {err}") from err
+            values = np.fromiter(
+                _feature_values(rows), dtype=np.float64, count=len(rows) * len(FEATURES)
+            )
+            return values.reshape(len(rows), len(FEATURES))
+
+        reader = csv.reader(line.decode() for line in lines)
+        if self.columns is None:
+            header = [name.strip() for name in next(reader)]
+            missing = [name for name in FEATURES if name not in header]
+            if missing:
+                raise DecodeError(f"CSV header is missing {missing}")
+            self.columns = [header.index(name) for name in FEATURES]
+        try:
+            values = [[row[i] for i in self.columns] for row in reader]
+            return np.array(values, dtype=np.float64).reshape(-1, len(FEATURES))
+        except (IndexError, ValueError) as err:
+            raise DecodeError(f"invalid CSV row: {err}") from err
@@ -0,0 +1,165 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+import numpy as np
+from loguru import logger
+
+from services.admission import AdmissionController
+
+BACKENDS = ("inline", "thread", "process")
+
+
+def load_worker_model():
+    """Process pool initializer, loads the model once per worker."""
+    from core.errors import ModelLoadException
+    from services.predict import MachineLearningModelHandlerScore, get_load_wrapper
+
+    try:
+        MachineLearningModelHandlerScore.get_model(get_load_wrapper())
+    except (Exception, ModelLoadException) as err:
+        logger.error(f"inference worker could not preload model: {err}")
+
+
+def timed_call(fn, data_point):
+    """Call ``fn`` and return its result with monotonic start and end times.
+
+    The monotonic clock is system-wide, so process workers' timestamps can
+    be compared with the caller's.
+    """
+    started = time.monotonic()
+    result = fn(data_point)
+    return result, started, time.monotonic()
+
+
+class InferenceExecutor(object):
+    """Run model calls inline, on a dedicated thread pool or a process pool.
+
+    Calls are admitted through ``admission``, by default an
+    ``AdmissionController`` with ``pool_size`` slots and ``queue_depth``
+    waiting calls, so the pool's own queue stays empty and callers past the
+    bound get ``Overloaded`` instead of an ever longer wait. Process workers
+    run ``initializer`` on start-up and the functions they are given must be
+    importable module-level callables. A process pool broken by a dying
+    worker is replaced and the call retried once on the new pool. Process
+    workers keep their own model registry, so version loads are per worker
+    while request counts and latencies are recorded by the caller in the API
+    process. ``observer`` is called with the seconds each call waited for a
+    worker and the seconds it ran.
+    """
+
+    def __init__(
+        self,
+        backend="thread",
+        pool_size=4,
+        queue_depth=64,
+        initializer=None,
+        observer=None,
+        admission=None,
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}")
+        self.backend = backend
+        self.pool_size = pool_size
+        self.queue_depth = queue_depth
+        self.initializer = initializer
+        self.observer = observer
+        if admission is None:
+            admission = AdmissionController(pool_size, queue_depth)
+        self.admission = admission
+        self.pending = 0
+        self._pool = None
+
+    async def run(self, fn, data_point, priority=False):
+        submitted = time.monotonic()
+        if self.backend == "inline":
+            result, started, finished = timed_call(fn, data_point)
+            self._observe(submitted, started, finished)
+            return result
+        if self.backend == "process":
+            data_point = np.ascontiguousarray(data_point)
+        loop = asyncio.get_running_loop()
+        call = partial(timed_call, fn)
+        self.pending += 1
+        try:
+            async with self.admission.admit(priority):
+                pool = self._get_pool()
+                try:
+                    timed = await loop.run_in_executor(pool, call, data_point)
+                except BrokenProcessPool:
+                    logger.warning("inference worker died, starting a new process pool")
+                    self._discard(pool)
+                    timed = await loop.run_in_executor(
+                        self._get_pool(), call, data_point
+                    )
+        finally:
+            self.pending -= 1
+        result, started, finished = timed
+        self._observe(submitted, started, finished)
+        return result
+
+    def queued(self):
+        """Calls waiting for a worker."""
+        if self.backend == "inline":
+            return 0
+        return self.admission.waiting()
+
+    async def recycle(self, fn, data_point):
+        """Replace the process workers, e.g. after the model was reloaded.
+
+        The new pool is started and warmed with one ``fn(data_point)`` call
+        per worker before it is swapped in, so workers are spawned and load
+        the model while the old pool keeps serving. Calls already running
+        finish on the old workers. If the warm-up fails the old pool is kept.
+        """
+        if self.backend != "process" or self._pool is None:
+            return
+        pool = self._new_pool()
+        loop = asyncio.get_running_loop()
+        data_point = np.ascontiguousarray(data_point)
+        try:
+            await asyncio.gather(
+                *(
+                    loop.run_in_executor(pool, fn, data_point)
+                    for _ in range(self.pool_size)
+                )
+            )
+        except BaseException:
+            pool.shutdown(wait=False)
+            raise
+        old, self._pool = self._pool, pool
+        if old is not None:
+            old.shutdown(wait=False)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _observe(self, submitted, started, finished):
+        if self.observer is not None:
+            self.observer(max(started - submitted, 0.0), finished - started)
+
+    def _discard(self, pool):
+        if self._pool is pool:
+            self._pool = None
+        pool.shutdown(wait=False)
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = self._new_pool()
+        return self._pool
+
+    def _new_pool(self):
+        if self.backend == "process":
+            return ProcessPoolExecutor(
+                max_workers=self.pool_size,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self.initializer,
+            )
+        return ThreadPoolExecutor(
+            max_workers=self.pool_size, thread_name_prefix="inference"
+        )
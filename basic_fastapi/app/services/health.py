@@ -0,0 +1,121 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+
+from models.prediction import MachineLearningDataInput
+
+
+class HealthMonitor(object):
+    """Keep a cached readiness verdict so probes never run the model.
+
+    ``start`` parses the example input and launches a background task that
+    scores it right away, then every ``interval`` seconds, or every
+    ``retry_interval`` seconds while the check fails. Probes only read the
+    last verdict, before the first check has finished they report not ready.
+    ``start`` can be given an awaitable, e.g. the warm-up, that must finish
+    before the first check. Without ``start`` the first probe runs the
+    check and launches the task.
+    Checks go through the priority lane of ``admission`` when given, so an
+    overloaded model does not shed or starve them.
+    """
+
+    def __init__(self, predict_fn, interval=30.0, retry_interval=2.0, admission=None):
+        self.predict_fn = predict_fn
+        self.admission = admission
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.verdict = None
+        self.checked_at = None
+        self._path = None
+        self._example_path = None
+        self._example = None
+        self._after = None
+        self._loop = None
+        self._worker = None
+
+    def load_example(self, path):
+        if path != self._example_path:
+            content = Path(path).read_text()
+            self._example = MachineLearningDataInput(
+                **json.loads(content)
+            ).get_np_array()
+            self._example_path = path
+        return self._example
+
+    def check(self, path):
+        try:
+            self.predict_fn(self.load_example(path))
+            verdict = True
+        except Exception as err:
+            logger.warning(f"health check failed: {err}")
+            verdict = False
+        self.verdict = verdict
+        self.checked_at = time.time()
+        return verdict
+
+    async def start(self, path, after=None):
+        self._path = path
+        self._after = after
+        self.verdict = None
+        try:
+            self.load_example(path)
+        except Exception as err:
+            logger.warning(f"health check example could not be parsed: {err}")
+        await self.stop()
+        self._ensure_worker()
+
+    async def is_ready(self, path):
+        if self._running() and path == self._path:
+            return bool(self.verdict)
+        self._path = path
+        verdict = await self._check(path)
+        self._ensure_worker()
+        return verdict
+
+    async def stop(self):
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    def _running(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return (
+            self._worker is not None and not self._worker.done() and self._loop is loop
+        )
+
+    def _ensure_worker(self):
+        if not self._running():
+            self._loop = asyncio.get_running_loop()
+            self._worker = self._loop.create_task(self._run())
+
+    async def _run(self):
+        if self._after is not None:
+            try:
+                await self._after
+            except Exception as err:
+                logger.warning(f"health check gate failed: {err}")
+            self._after = None
+        while True:
+            if self.verdict is not None:
+                await asyncio.sleep(
+                    self.interval if self.verdict else self.retry_interval
+                )
+            await self._check(self._path)
+
+    async def _check(self, path):
+        if self.admission is None:
+            return await run_in_threadpool(self.check, path)
+        async with self.admission.admit(priority=True):
+            return await run_in_threadpool(self.check, path)
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import time
+from collections import deque
+
+from loguru import logger
+from sqlalchemy import insert
+
+from db import run_session
+from models.log import PredictionLog, RequestLog
+from services.codec import FEATURES
+
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest")
+LOG_FORMATS = ("json", "columnar", "both")
+
+
+def _as_dict(record):
+    return record.model_dump() if hasattr(record, "model_dump") else record
+
+
+def _json_row(data_input, response, version, created_ms):
+    return {
+        "request": json.dumps(_as_dict(data_input)),
+        "response": json.dumps(_as_dict(response)),
+    }
+
+
+def _columnar_row(data_input, response, version, created_ms):
+    features = _as_dict(data_input)
+    response = _as_dict(response)
+    row = {name: float(features[name]) for name in FEATURES}
+    row.update(
+        created_ms=created_ms,
+        model_version=version,
+        prediction=float(response["prediction"]),
+        label=response["prediction_label"],
+    )
+    return row
+
+
+class RequestLogWriter(object):
+    """Buffer request logs in memory and write them in bulk off the hot path.
+
+    A background task flushes the queue once ``batch_size`` rows are waiting
+    or every ``flush_interval`` seconds. When ``max_queue_size`` rows are
+    already queued, ``overflow`` decides whether the incoming row
+    (``drop_newest``) or the oldest queued row (``drop_oldest``) is lost.
+    ``log_format`` picks the tables written: ``json`` blobs in
+    ``request_logs``, typed columns in ``prediction_logs`` or ``both``.
+    Rows are stamped with ``clock`` when they are handed over, not when
+    they are flushed. Background flushes go through ``async_session_factory`` when given.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        max_queue_size=10000,
+        batch_size=500,
+        flush_interval=1.0,
+        overflow="drop_newest",
+        log_format="json",
+        async_session_factory=None,
+        clock=time.time,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        if log_format not in LOG_FORMATS:
+            raise ValueError(f"log_format must be one of {LOG_FORMATS}")
+        self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.log_format = log_format
+        self.clock = clock
+        self.queue = deque()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._loop = None
+        self._wakeup = None
+        self._worker = None
+
+    def enqueue(self, pairs, version="default"):
+        created_ms = int(self.clock() * 1000)
+        for data_input, response in pairs:
+            if len(self.queue) >= self.max_queue_size:
+                self.dropped += 1
+                if self.overflow == "drop_newest":
+                    continue
+                self.queue.popleft()
+            self.queue.append((data_input, response, version, created_ms))
+        self._ensure_worker()
+        if len(self.queue) >= self.batch_size:
+            self._wakeup.set()
+
+    def write(self, pairs, version="default"):
+        created_ms = int(self.clock() * 1000)
+        self.write_records(
+            [
+                (data_input, response, version, created_ms)
+                for data_input, response in pairs
+            ]
+        )
+
+    def write_records(self, records):
+        if not records:
+            return
+        try:
+            with self.session_factory() as db:
+                self._insert(db, records)
+            self.written += len(records)
+        except Exception:
+            self.failed += len(records)
+            logger.exception("failed to log request")
+
+    async def flush(self):
+        session_factory = self.async_session_factory or self.session_factory
+        while self.queue:
+            size = min(self.batch_size, len(self.queue))
+            batch = [self.queue.popleft() for _ in range(size)]
+            try:
+                await run_session(session_factory, self._insert, batch)
+                self.written += len(batch)
+            except Exception:
+                self.failed += len(batch)
+                logger.exception("failed to log request")
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        await self.flush()
+
+    def stats(self):
+        return {
+            "queued": len(self.queue),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def _insert(self, db, records):
+        if self.log_format in ("json", "both"):
+            db.execute(insert(RequestLog), [_json_row(*record) for record in records])
+        if self.log_format in ("columnar", "both"):
+            db.execute(
+                insert(PredictionLog), [_columnar_row(*record) for record in records]
+            )
+        db.commit()
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
@@ -0,0 +1,184 @@
+import math
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+request_started = ContextVar("request_started", default=None)
+
+
+class Value(object):
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount=1.0):
+        self.value += amount
+
+    def dec(self, amount=1.0):
+        self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+
+class Histogram(object):
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricFamily(object):
+    """A named metric with one child per combination of label values.
+
+    Children are plain objects updated without locks: every update is a
+    couple of attribute increments, cheap enough for the request path, and
+    almost all of them happen on the event loop thread. Callers on the hot
+    path keep the child returned by ``labels`` instead of looking it up per
+    request. A family built with ``fn`` is read by calling it at scrape time.
+    """
+
+    def __init__(self, name, help, kind, labelnames=(), buckets=None, fn=None):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets or DEFAULT_BUCKETS)
+        self.fn = fn
+        self.children = {}
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            if self.kind == "histogram":
+                child = Histogram(self.buckets)
+            else:
+                child = Value()
+            child = self.children.setdefault(values, child)
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        if self.fn is not None:
+            value = self.fn()
+            if value is not None:
+                lines.append(f"{self.name} {_number(value)}")
+        for values, child in list(self.children.items()):
+            labels = dict(zip(self.labelnames, values))
+            if self.kind != "histogram":
+                lines.append(f"{self.name}{_labels(labels)} {_number(child.value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), child.counts):
+                cumulative += count
+                le = _labels(labels, le=_number(bound))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {_number(child.sum)}")
+            lines.append(f"{self.name}_count{_labels(labels)} {child.count}")
+        return lines
+
+
+class MetricsRegistry(object):
+    """Process-local metrics rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self.families = {}
+
+    def counter(self, name, help, labelnames=(), fn=None):
+        return self._add(MetricFamily(name, help, "counter", labelnames, fn=fn))
+
+    def gauge(self, name, help, labelnames=(), fn=None):
+        return self._add(MetricFamily(name, help, "gauge", labelnames, fn=fn))
+
+    def histogram(self, name, help, labelnames=(), buckets=None):
+        return self._add(
+            MetricFamily(name, help, "histogram", labelnames, buckets=buckets)
+        )
+
+    def render(self):
+        lines = []
+        for family in list(self.families.values()):
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+    def _add(self, family):
+        return self.families.setdefault(family.name, family)
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+def _labels(labels, **extra):
+    labels = {**labels, **extra}
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+metrics = MetricsRegistry()
+
+
+class MetricsMiddleware(object):
+    """Count in-flight requests and time each one per route.
+
+    Also stamps the start of the request into ``request_started`` so
+    endpoints can tell how long parsing their body took.
+    """
+
+    def __init__(self, app, registry=metrics):
+        self.app = app
+        self.in_flight = registry.gauge(
+            "http_requests_in_flight", "Requests being served."
+        ).labels()
+        self.seconds = registry.histogram(
+            "http_request_duration_seconds",
+            "Time to serve a request.",
+            ("route", "method"),
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        token = request_started.set(started)
+        self.in_flight.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight.dec()
+            request_started.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            self.seconds.labels(route, scope["method"]).observe(
+                time.perf_counter() - started
+            )
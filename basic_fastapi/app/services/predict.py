@@ -1,13 +1,77 @@
+import glob
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
 
+import joblib
 from loguru import logger
 
 from core.errors import PredictException, ModelLoadException
-from core.config import MODEL_NAME, MODEL_PATH
+from core.config import (
+    MODEL_COMPILE_FLAG,
+    MODEL_COMPILE_MAX_ROWS,
+    MODEL_MMAP_MODE,
+    MODEL_NAME,
+    MODEL_PATH,
+)
+from services.trees import load_compiled
+
+
+def load_mmap(path, mmap_mode="r"):
+    """Load ``path`` with its numpy arrays memory-mapped from disk.
+
+    joblib can only map arrays out of uncompressed dumps, so an uncompressed
+    copy named after the model's content hash is written next to it the
+    first time and loaded instead. Every worker mapping that copy shares the
+    same page cache, copies of older models are removed.
+    """
+    version = model_version(path)
+    mmap_path = f"{path}.{version}.mmap"
+    if not os.path.exists(mmap_path):
+        tmp_path = f"{mmap_path}.{os.getpid()}.tmp"
+        joblib.dump(joblib.load(path), tmp_path, compress=0)
+        os.replace(tmp_path, mmap_path)
+        for stale in glob.glob(f"{glob.escape(path)}.*.mmap"):
+            if stale != mmap_path:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+    return joblib.load(mmap_path, mmap_mode=mmap_mode)
+
+
+def model_version(path):
+    """Short content hash of the model file, ``None`` if it cannot be read."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as model_file:
+            for chunk in iter(lambda: model_file.read(2**20), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()[:12]
+
+
+def get_load_wrapper():
+    loader = joblib.load
+    if MODEL_MMAP_MODE:
+        loader = partial(load_mmap, mmap_mode=MODEL_MMAP_MODE)
+    if MODEL_COMPILE_FLAG:
+        return partial(load_compiled, loader, max_rows=MODEL_COMPILE_MAX_ROWS)
+    return loader
 
 
 class MachineLearningModelHandlerScore(object):
     model = None
+    version = None
+    loaded_at = None
+    reload_seconds = None
+    shadow_model = None
+    shadow_version = None
+    _reload_lock = threading.Lock()
 
     @classmethod
     def predict(cls, input, load_wrapper=None, method="predict"):
@@ -16,19 +80,71 @@ class MachineLearningModelHandlerScore(object):
             return getattr(clf, method)(input)
         raise PredictException(f"'{method}' attribute is missing")
 
+    @classmethod
+    def predict_shadow(cls, input, method="predict"):
+        clf = cls.shadow_model
+        if clf is None:
+            raise PredictException("no shadow model registered")
+        if hasattr(clf, method):
+            return getattr(clf, method)(input)
+        raise PredictException(f"'{method}' attribute is missing")
+
+    @classmethod
+    def register_shadow(cls, model, version=None):
+        """Score ``model`` next to the main model, ``None`` to stop."""
+        cls.shadow_model = model
+        cls.shadow_version = version if model is not None else None
+
     @classmethod
     def get_model(cls, load_wrapper):
         if cls.model is None and load_wrapper:
-            cls.model = cls.load(load_wrapper)
+            cls.swap(cls.load(load_wrapper))
         return cls.model
 
+    @classmethod
+    def reload(cls, load_wrapper, warmup_input=None, method="predict"):
+        """Load the model file again and swap it in without a restart.
+
+        The new model scores ``warmup_input`` before it is published, a
+        failure there keeps the current model. Requests already holding the
+        old model finish on it.
+        """
+        with cls._reload_lock:
+            started = time.perf_counter()
+            model = cls.load(load_wrapper)
+            if warmup_input is not None:
+                if not hasattr(model, method):
+                    raise PredictException(f"'{method}' attribute is missing")
+                getattr(model, method)(warmup_input)
+            cls.swap(model)
+            cls.reload_seconds = time.perf_counter() - started
+        logger.info(f"model {cls.version} swapped in after {cls.reload_seconds:.3f}s")
+        return model
+
+    @classmethod
+    def swap(cls, model):
+        cls.version = model_version(cls.model_path())
+        cls.loaded_at = time.time()
+        cls.model = model
+
+    @classmethod
+    def info(cls):
+        return {
+            "version": cls.version,
+            "loaded_at": cls.loaded_at,
+            "reload_seconds": cls.reload_seconds,
+        }
+
     @staticmethod
-    def load(load_wrapper):
-        model = None
+    def model_path():
         if MODEL_PATH.endswith("/"):
-            path = f"{MODEL_PATH}{MODEL_NAME}"
-        else:
-            path = f"{MODEL_PATH}/{MODEL_NAME}"
+            return f"{MODEL_PATH}{MODEL_NAME}"
+        return f"{MODEL_PATH}/{MODEL_NAME}"
+
+    @classmethod
+    def load(cls, load_wrapper):
+        model = None
+        path = cls.model_path()
         if not os.path.exists(path):
             message = f"Machine learning model at {path} not exists!"
             logger.error(message)
@@ -39,3 +155,74 @@ class MachineLearningModelHandlerScore(object):
             logger.error(message)
             raise ModelLoadException(message)
         return model
+
+
+class PredictionCache(object):
+    """Bounded LRU cache of predictions keyed on the input feature tuple.
+
+    Entries expire ``ttl`` seconds after they are stored and the whole cache
+    is dropped as soon as it is consulted with a different model object, so
+    a reloaded model never serves stale results. ``set`` ignores results of
+    a model the cache no longer holds, e.g. one swapped out while the
+    prediction was in flight. Meant to be used from the event loop only, it
+    does no locking.
+    """
+
+    def __init__(self, max_size=10000, ttl=300.0, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._model = None
+
+    def get(self, key, model):
+        self._check_model(model)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, model):
+        if self._model is None:
+            self._model = model
+        elif model is not self._model:
+            return
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _check_model(self, model):
+        if model is not self._model:
+            if self._entries:
+                self.invalidations += 1
+                self.clear()
+            self._model = model
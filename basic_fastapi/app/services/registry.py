@@ -0,0 +1,167 @@
+import os
+import random
+import re
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+from loguru import logger
+
+from core.errors import ModelLoadException, ModelNotFoundException, PredictException
+
+DEFAULT_VERSION = "default"
+VERSION_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+
+def parse_traffic_split(value):
+    """Parse ``"v1:90,v2:10"`` into ``{"v1": 90.0, "v2": 10.0}``."""
+    weights = {}
+    for part in filter(None, (part.strip() for part in value.split(","))):
+        version, _, weight = part.partition(":")
+        weights[version.strip()] = float(weight or 1)
+    return weights
+
+
+class ModelVersion(object):
+    def __init__(self, model, size_bytes):
+        self.model = model
+        self.size_bytes = size_bytes
+
+
+class VersionStats(object):
+    def __init__(self, window=1024):
+        self.size_bytes = 0
+        self.requests = 0
+        self.latencies = deque(maxlen=window)
+
+
+class ModelRegistry(object):
+    """Serve several model versions from one process.
+
+    Version ``name`` is loaded lazily from ``<model_dir>/<name>/<model_name>``
+    on first use. The least recently used versions are evicted once the
+    loaded files exceed ``memory_budget_bytes``, the file size on disk being
+    the estimate of a model's footprint. ``traffic_split`` maps versions to
+    weights used when a request does not ask for a version; the reserved
+    name ``default`` stands for the main model. Loads and evictions happen
+    in the process running the model, with the ``process`` inference backend
+    that is each worker, so ``loads``, ``evictions`` and ``loaded`` then only
+    describe the API process.
+    """
+
+    def __init__(
+        self,
+        load_wrapper,
+        model_dir,
+        model_name,
+        memory_budget_bytes=2**30,
+        traffic_split=None,
+        window=1024,
+    ):
+        self.load_wrapper = load_wrapper
+        self.model_dir = model_dir
+        self.model_name = model_name
+        self.memory_budget_bytes = memory_budget_bytes
+        self.traffic_split = traffic_split or {}
+        self.window = window
+        self.loads = 0
+        self.evictions = 0
+        self._versions = OrderedDict()
+        self._stats = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, requested=None):
+        """Pick the version for a request, ``None`` meaning the main model."""
+        version = requested
+        if version is None and self.traffic_split:
+            versions = list(self.traffic_split)
+            weights = list(self.traffic_split.values())
+            version = random.choices(versions, weights=weights)[0]
+        if version is None or version == DEFAULT_VERSION:
+            return None
+        if not VERSION_PATTERN.match(version):
+            raise ModelNotFoundException(f"Model version '{version}' is invalid")
+        return version
+
+    def get(self, version):
+        with self._lock:
+            if version in self._versions:
+                self._versions.move_to_end(version)
+                return self._versions[version]
+            loading = self._loading.setdefault(version, threading.Lock())
+        # only callers of this version wait for its load, others keep serving
+        with loading:
+            with self._lock:
+                if version in self._versions:
+                    return self._versions[version]
+            try:
+                entry = self._load(version)
+                with self._lock:
+                    self._versions[version] = entry
+                    stats = self._stats.setdefault(version, VersionStats(self.window))
+                    stats.size_bytes = entry.size_bytes
+                    self.loads += 1
+                    self._evict()
+            finally:
+                with self._lock:
+                    self._loading.pop(version, None)
+            return entry
+
+    def predict(self, version, data_point, method="predict"):
+        entry = self.get(version)
+        if not hasattr(entry.model, method):
+            raise PredictException(f"'{method}' attribute is missing")
+        return getattr(entry.model, method)(data_point)
+
+    def record(self, version, seconds):
+        """Count a request served by ``version``, ``None`` being the main model.
+
+        Called by the API process around the executor call, so the numbers
+        cover every backend and include time spent waiting for a worker.
+        """
+        name = version or DEFAULT_VERSION
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats.setdefault(name, VersionStats(self.window))
+            stats.size_bytes = self._file_size(name)
+        stats.requests += 1
+        stats.latencies.append(seconds)
+
+    def stats(self):
+        versions = {}
+        for name, stats in list(self._stats.items()):
+            latencies = np.array(stats.latencies or [0.0]) * 1000
+            versions[name] = {
+                "loaded": name == DEFAULT_VERSION or name in self._versions,
+                "size_bytes": stats.size_bytes,
+                "requests": stats.requests,
+                "latency_p50_ms": float(np.percentile(latencies, 50)),
+                "latency_p99_ms": float(np.percentile(latencies, 99)),
+            }
+        return versions
+
+    def _load(self, version):
+        path = os.path.join(self.model_dir, version, self.model_name)
+        if not os.path.exists(path):
+            raise ModelNotFoundException(f"Model version '{version}' not exists!")
+        model = self.load_wrapper(path)
+        if not model:
+            raise ModelLoadException(f"Model version '{version}' could not load!")
+        logger.info(f"model version {version} loaded from {path}")
+        return ModelVersion(model, os.path.getsize(path))
+
+    def _file_size(self, name):
+        if name == DEFAULT_VERSION:
+            path = os.path.join(self.model_dir, self.model_name)
+        else:
+            path = os.path.join(self.model_dir, name, self.model_name)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def _evict(self):
+        used = sum(entry.size_bytes for entry in self._versions.values())
+        while used > self.memory_budget_bytes and len(self._versions) > 1:
+            name, entry = self._versions.popitem(last=False)
+            used -= entry.size_bytes
+            self.evictions += 1
+            logger.info(f"model version {name} evicted from registry")
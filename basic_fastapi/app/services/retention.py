@@ -0,0 +1,182 @@
+import asyncio
+import importlib.util
+import itertools
+import os
+import time
+from pathlib import Path
+
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from sqlalchemy import delete, func, select
+
+from models.log import PredictionLog, RequestLog
+
+
+class LogRetention(object):
+    """Move old request log rows to compressed Parquet files.
+
+    Every ``interval`` seconds, ``prediction_logs`` rows older than
+    ``hot_days`` and ``request_logs`` rows beyond the newest ``hot_rows``
+    (that table has no timestamp) are archived in id order, ``batch_rows``
+    at a time, to ``<archive_dir>/<table>/part-<first id>-<last id>.parquet``
+    and deleted once their file is in place. Part files are never replaced:
+    a batch interrupted between the two finds its own file and only deletes,
+    a different batch with the same ids gets a ``-<n>`` suffix. The pass sleeps ``pause``
+    seconds between batches, is postponed while ``busy_fn`` reports request
+    traffic waiting, and ends with an incremental vacuum on SQLite. Run it
+    in one worker only.
+    """
+
+    def __init__(
+        self,
+        engine,
+        archive_dir,
+        hot_days=7.0,
+        hot_rows=1_000_000,
+        batch_rows=5000,
+        interval=3600.0,
+        pause=0.05,
+        vacuum_pages=1000,
+        busy_fn=None,
+        clock=time.time,
+    ):
+        self.engine = engine
+        self.archive_dir = Path(archive_dir)
+        self.hot_days = hot_days
+        self.hot_rows = hot_rows
+        self.batch_rows = batch_rows
+        self.interval = interval
+        self.pause = pause
+        self.vacuum_pages = vacuum_pages
+        self.busy_fn = busy_fn
+        self.clock = clock
+        self.runs = 0
+        self.postponed = 0
+        self.archived = 0
+        self.files = 0
+        self.last_run_at = None
+        self._worker = None
+
+    async def start(self):
+        await self.stop()
+        if self.interval <= 0:
+            return
+        if importlib.util.find_spec("pyarrow") is None:
+            logger.warning("request log retention needs pyarrow, not started")
+            return
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def run_once(self):
+        """Archive everything past the retention windows, return the row count."""
+        conditions = await run_in_threadpool(self.conditions)
+        archived = 0
+        for table, condition in conditions:
+            while True:
+                if self.busy_fn is not None and self.busy_fn():
+                    self.postponed += 1
+                    logger.info("request log retention postponed, traffic waiting")
+                    return archived
+                rows = await run_in_threadpool(self.archive_batch, table, condition)
+                archived += rows
+                if rows < self.batch_rows:
+                    break
+                await asyncio.sleep(self.pause)
+        if archived:
+            await run_in_threadpool(self.vacuum)
+            logger.info(f"archived {archived} request log rows to {self.archive_dir}")
+        self.runs += 1
+        self.last_run_at = self.clock()
+        return archived
+
+    def conditions(self):
+        cutoff_ms = int((self.clock() - self.hot_days * 86400) * 1000)
+        with self.engine.connect() as connection:
+            last_id = connection.execute(select(func.max(RequestLog.id))).scalar()
+        return [
+            (PredictionLog.__table__, PredictionLog.created_ms < cutoff_ms),
+            (RequestLog.__table__, RequestLog.id <= (last_id or 0) - self.hot_rows),
+        ]
+
+    def archive_batch(self, table, condition):
+        import pandas as pd
+
+        with self.engine.connect() as connection:
+            result = connection.execute(
+                select(table)
+                .where(condition)
+                .order_by(table.c.id)
+                .limit(self.batch_rows)
+            )
+            frame = pd.DataFrame(result.all(), columns=list(result.keys()))
+        if frame.empty:
+            return 0
+        first_id, last_id = int(frame["id"].iloc[0]), int(frame["id"].iloc[-1])
+        path = self.part_path(table.name, first_id, last_id, frame)
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            frame.to_parquet(tmp_path, index=False, compression="zstd")
+            os.replace(tmp_path, path)
+            self.files += 1
+        with self.engine.begin() as connection:
+            connection.execute(
+                delete(table).where(condition, table.c.id.between(first_id, last_id))
+            )
+        self.archived += len(frame)
+        return len(frame)
+
+    def part_path(self, table_name, first_id, last_id, frame):
+        """A free file name for ``frame``, None if it is archived already."""
+        import pandas as pd
+
+        stem = f"part-{first_id:012d}-{last_id:012d}"
+        for attempt in itertools.count():
+            suffix = f"-{attempt}" if attempt else ""
+            path = self.archive_dir / table_name / f"{stem}{suffix}.parquet"
+            if not path.exists():
+                return path
+            if pd.read_parquet(path).equals(frame):
+                return None
+
+    def vacuum(self):
+        """Give freed pages back to the file system, a few at a time."""
+        if self.engine.dialect.name != "sqlite":
+            return
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            # the pragma frees one page per step, fetch them all
+            cursor.execute(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)})")
+            cursor.fetchall()
+            cursor.close()
+            connection.commit()
+        finally:
+            connection.close()
+
+    def stats(self):
+        return {
+            "running": self._worker is not None and not self._worker.done(),
+            "runs": self.runs,
+            "postponed": self.postponed,
+            "archived": self.archived,
+            "files": self.files,
+            "last_run_at": self.last_run_at,
+        }
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("request log retention failed")
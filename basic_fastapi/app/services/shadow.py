@@ -0,0 +1,148 @@
+import asyncio
+import time
+from collections import deque
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+
+from core.errors import PredictException
+
+
+class ShadowEvaluator(object):
+    """Score a candidate model on live inputs after the response is sent.
+
+    The rows scored by the main model are queued together with its
+    predictions, a background task stacks up to ``batch_size`` rows, scores
+    them with ``predict_fn`` on the threadpool and keeps only aggregates:
+    how many predictions agreed within ``tolerance``, the mean absolute
+    difference and batch latencies. Shadow traffic is shed first: rows past
+    ``max_queue_rows`` are dropped on arrival, and queued batches are dropped
+    while ``busy_fn`` reports the main model under pressure.
+    """
+
+    def __init__(
+        self,
+        predict_fn,
+        max_queue_rows=10000,
+        batch_size=256,
+        flush_interval=0.5,
+        tolerance=1e-9,
+        busy_fn=None,
+        window=1024,
+    ):
+        self.predict_fn = predict_fn
+        self.max_queue_rows = max_queue_rows
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.tolerance = tolerance
+        self.busy_fn = busy_fn
+        self.queue = deque()
+        self.queued_rows = 0
+        self.compared = 0
+        self.agreed = 0
+        self.abs_diff_sum = 0.0
+        self.batches = 0
+        self.shed = 0
+        self.failed = 0
+        self.latencies = deque(maxlen=window)
+        self._loop = None
+        self._wakeup = None
+        self._worker = None
+
+    def enqueue(self, data_points, predictions):
+        rows = len(data_points)
+        if self.queued_rows + rows > self.max_queue_rows:
+            self.shed += rows
+            return
+        self.queue.append((data_points, predictions))
+        self.queued_rows += rows
+        self._ensure_worker()
+        if self.queued_rows >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self):
+        while self.queue:
+            items, rows = [], 0
+            while self.queue and rows < self.batch_size:
+                item = self.queue.popleft()
+                items.append(item)
+                rows += len(item[0])
+            self.queued_rows -= rows
+            if self.busy_fn is not None and self.busy_fn():
+                self.shed += rows
+                continue
+            await self._score(items, rows)
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self.queue.clear()
+        self.queued_rows = 0
+
+    def reset(self):
+        """Forget the aggregates, e.g. when another shadow model is registered."""
+        self.compared = self.agreed = self.batches = self.shed = self.failed = 0
+        self.abs_diff_sum = 0.0
+        self.latencies.clear()
+
+    def stats(self):
+        latencies = np.array(self.latencies or [0.0]) * 1000
+        return {
+            "queued_rows": self.queued_rows,
+            "compared": self.compared,
+            "agreed": self.agreed,
+            "agreement_rate": self.agreed / self.compared if self.compared else 0.0,
+            "mean_abs_diff": (
+                self.abs_diff_sum / self.compared if self.compared else 0.0
+            ),
+            "batches": self.batches,
+            "shed": self.shed,
+            "failed": self.failed,
+            "latency_p50_ms": float(np.percentile(latencies, 50)),
+            "latency_p99_ms": float(np.percentile(latencies, 99)),
+        }
+
+    async def _score(self, items, rows):
+        data_points = np.vstack([data_points for data_points, _ in items])
+        primary = np.concatenate(
+            [np.ravel(np.asarray(predictions, dtype=float)) for _, predictions in items]
+        )
+        try:
+            started = time.perf_counter()
+            shadow = await run_in_threadpool(self.predict_fn, data_points)
+            seconds = time.perf_counter() - started
+            shadow = np.ravel(np.asarray(shadow, dtype=float))
+            if len(shadow) != rows:
+                raise ValueError(f"shadow model returned {len(shadow)} predictions")
+        except (Exception, PredictException) as err:
+            self.failed += rows
+            logger.warning(f"shadow model failed on {rows} rows: {err}")
+            return
+        diff = np.abs(shadow - primary)
+        self.compared += rows
+        self.agreed += int(np.count_nonzero(diff <= self.tolerance))
+        self.abs_diff_sum += float(diff.sum())
+        self.batches += 1
+        self.latencies.append(seconds)
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
@@ -0,0 +1,75 @@
+import asyncio
+import os
+
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+
+from core.errors import ModelLoadException, PredictException
+from services.predict import model_version
+
+
+class ModelWatcher(object):
+    """Reload the model when its file changes on disk.
+
+    ``POST /admin/model/reload`` only swaps the model in the worker that got
+    the request, every uvicorn worker runs its own watcher so all of them
+    follow a new ``model.pkl`` within ``interval`` seconds. The file is
+    hashed only when its size or mtime changed, and ``reload_fn`` only runs
+    when the hash differs from ``version_fn()``, the version being served.
+    """
+
+    def __init__(self, path_fn, version_fn, reload_fn, interval=10.0):
+        self.path_fn = path_fn
+        self.version_fn = version_fn
+        self.reload_fn = reload_fn
+        self.interval = interval
+        self.reloads = 0
+        self.failures = 0
+        self._signature = None
+        self._worker = None
+
+    async def start(self):
+        if self.interval <= 0 or self._worker is not None:
+            return
+        self._signature = self._stat()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def poll(self):
+        """Check the file once, returns whether a new model was swapped in."""
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+        version = await run_in_threadpool(model_version, self.path_fn())
+        if version is None or version == self.version_fn():
+            return False
+        try:
+            await self.reload_fn()
+        except (Exception, ModelLoadException, PredictException) as err:
+            self.failures += 1
+            logger.error(f"model file changed but could not be reloaded: {err}")
+            return False
+        self.reloads += 1
+        return True
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path_fn())
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.poll()
@@ -0,0 +1,74 @@
+"""Compare /predict/batch with the fast decode path of /predict/fast.
+
+Both endpoints are called through the ASGI app in-process, so the timing
+covers what FastAPI really does with the body (``json.loads`` then pydantic
+validation of every row, response validation and encoding) against the
+fast path. The model and the request log are stubbed out.
+
+    python -m benchmarks.bench_decode
+"""
+
+import asyncio
+import json
+import logging
+import time
+
+import httpx
+import numpy as np
+
+from api.routes import predictor
+from main import get_application
+from services.codec import FEATURES
+
+ROW_COUNTS = (1, 100, 10000)
+
+
+def make_body(rows):
+    rng = np.random.default_rng(0)
+    payload = [dict(zip(FEATURES, row)) for row in rng.random((rows, 5)).tolist()]
+    return json.dumps(payload).encode()
+
+
+async def bench(client, url, body, repeat=5, budget_rows=20000):
+    number = max(1, budget_rows // len(json.loads(body)))
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            response = await client.post(
+                url, content=body, headers={"content-type": "application/json"}
+            )
+        best = min(best, time.perf_counter() - started)
+    assert response.status_code == 200, response.text
+    return best / number
+
+
+async def run(row_counts=ROW_COUNTS, repeat=5, budget_rows=20000):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    predictor.get_prediction = lambda data_points: np.zeros(len(data_points))
+    predictor.log_requests = lambda *args: None
+    transport = httpx.ASGITransport(app=get_application())
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        print(f"{'rows':>8} {'batch ms':>10} {'fast ms':>10} {'speedup':>8}")
+        for rows in row_counts:
+            body = make_body(rows)
+            responses = [
+                (await client.post(url, content=body)).json()
+                for url in ("/api/v1/predict/batch", "/api/v1/predict/fast")
+            ]
+            assert responses[0] == responses[1]
+            slow, fast = [
+                await bench(client, url, body, repeat, budget_rows) * 1000
+                for url in ("/api/v1/predict/batch", "/api/v1/predict/fast")
+            ]
+            print(f"{rows:>8} {slow:>10.4f} {fast:>10.4f} {slow / fast:>7.1f}x")
+
+
+def main():
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
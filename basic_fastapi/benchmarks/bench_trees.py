@@ -0,0 +1,64 @@
+"""Compare sklearn's predict with the compiled tree engine.
+
+A random forest shaped like the served model is trained on synthetic data
+and every engine scores the same rows, checked to agree before timing.
+"compiled" is the array traversal alone, "served" is what the app runs
+with the default ``MODEL_COMPILE_MAX_ROWS`` dispatch to sklearn.
+
+    python -m benchmarks.bench_trees
+"""
+
+import time
+
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+
+from services.codec import FEATURES
+from services.trees import compile_model
+
+ROW_COUNTS = (1, 10, 100, 1000, 10000)
+
+
+def bench(fn, rows, repeat=3, budget=0.2):
+    """Best time per call over ``repeat`` runs of about ``budget`` seconds."""
+    started = time.perf_counter()
+    fn(rows)
+    number = max(1, int(budget / max(time.perf_counter() - started, 1e-6)))
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn(rows)
+        best = min(best, time.perf_counter() - started)
+    return best / number
+
+
+def main(n_estimators=100, max_depth=10):
+    data, labels = make_classification(
+        n_samples=5000, n_features=len(FEATURES), random_state=0
+    )
+    model = RandomForestClassifier(
+        n_estimators=n_estimators, max_depth=max_depth, random_state=0
+    ).fit(data, labels)
+    compiled = compile_model(model, max_rows=max(ROW_COUNTS))
+    served = compile_model(model)
+    rng = np.random.default_rng(0)
+    print(
+        f"{'rows':>8} {'sklearn ms':>11} {'compiled ms':>12} {'served ms':>10} "
+        f"{'speedup':>8}"
+    )
+    for count in ROW_COUNTS:
+        rows = rng.normal(size=(count, len(FEATURES)))
+        assert np.array_equal(model.predict(rows), compiled.predict(rows))
+        slow = bench(model.predict, rows) * 1000
+        fast = bench(compiled.predict, rows) * 1000
+        chosen = bench(served.predict, rows) * 1000
+        print(
+            f"{count:>8} {slow:>11.4f} {fast:>12.4f} {chosen:>10.4f} "
+            f"{slow / chosen:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""Load test the API in-process and against a real uvicorn worker.
+
+A small random forest trained on synthetic data stands in for
+``model.pkl``, the request log goes to a throwaway SQLite file. Every
+scenario reports throughput and p50/p95/p99 latency, results are written
+as JSON and can be checked against an earlier run:
+
+    python -m benchmarks.load --out baseline.json
+    python -m benchmarks.load --baseline baseline.json --threshold 0.25
+
+The run fails when a scenario's p99 grows or its throughput drops by more
+than ``--threshold`` compared to the baseline.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import joblib
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+FEATURES = [f"feature{i}" for i in range(1, 6)]
+MODES = ("inprocess", "uvicorn")
+
+
+def single_payload():
+    return dict(zip(FEATURES, (0.5, -1.0, 1.5, 0.0, 2.0)))
+
+
+SCENARIOS = (
+    {
+        "name": "predict_single",
+        "method": "POST",
+        "url": "/api/v1/predict",
+        "json": single_payload(),
+        "log": True,
+    },
+    {
+        "name": "predict_single_nolog",
+        "method": "POST",
+        "url": "/api/v1/predict",
+        "json": single_payload(),
+        "log": False,
+    },
+    {
+        "name": "predict_batch_100",
+        "method": "POST",
+        "url": "/api/v1/predict/batch",
+        "json": [single_payload()] * 100,
+        "log": True,
+    },
+    {
+        "name": "health_ready",
+        "method": "GET",
+        "url": "/api/v1/health/ready",
+        "json": None,
+        "log": True,
+    },
+)
+
+
+def make_workdir(directory):
+    """Write the synthetic model and example input, return the app settings."""
+    from sklearn.datasets import make_classification
+    from sklearn.ensemble import RandomForestClassifier
+
+    data, labels = make_classification(
+        n_samples=2000, n_features=len(FEATURES), random_state=0
+    )
+    model = RandomForestClassifier(n_estimators=50, max_depth=8, random_state=0)
+    joblib.dump(model.fit(data, labels), directory / "model.pkl")
+    (directory / "example.json").write_text(json.dumps(single_payload()))
+    return {
+        "MODEL_PATH": f"{directory}/",
+        "MODEL_NAME": "model.pkl",
+        "INPUT_EXAMPLE": str(directory / "example.json"),
+        "DATABASE_URL": f"sqlite:///{directory / 'bench.db'}",
+        "MODEL_WATCH_INTERVAL": "0",
+    }
+
+
+def summarize(latencies, errors, seconds):
+    latencies = np.array(latencies or [0.0]) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / seconds if seconds else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+async def drive(client, scenario, requests, concurrency, warmup=20):
+    for _ in range(warmup):
+        await client.request(scenario["method"], scenario["url"], json=scenario["json"])
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.request(
+                scenario["method"], scenario["url"], json=scenario["json"]
+            )
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_inprocess(settings, scenarios, requests, concurrency):
+    os.environ.update(settings)
+    sys.path.insert(0, str(APP_DIR))
+    from api.routes import predictor
+    from main import get_application
+
+    app = get_application()
+    await app.router.startup()
+    results = {}
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            await wait_until_ready(client)
+            for scenario in scenarios:
+                predictor.REQUEST_LOG_FLAG = scenario["log"]
+                results[scenario["name"]] = await drive(
+                    client, scenario, requests, concurrency
+                )
+    finally:
+        await app.router.shutdown()
+    return results
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_ready(client, server=None, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if (await client.get("/api/v1/health/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("app did not become ready in time")
+
+
+async def run_uvicorn(settings, scenarios, requests, concurrency):
+    results = {}
+    for log in (True, False):
+        selected = [scenario for scenario in scenarios if scenario["log"] is log]
+        if not selected:
+            continue
+        port = free_port()
+        env = {**os.environ, **settings, "REQUEST_LOG_FLAG": str(log).lower()}
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "main:app",
+                "--app-dir",
+                str(APP_DIR),
+                "--port",
+                str(port),
+                "--log-level",
+                "warning",
+            ],
+            env=env,
+        )
+        try:
+            limits = httpx.Limits(max_connections=concurrency)
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30
+            ) as client:
+                await wait_until_ready(client, server)
+                for scenario in selected:
+                    results[scenario["name"]] = await drive(
+                        client, scenario, requests, concurrency
+                    )
+        finally:
+            server.terminate()
+            server.wait()
+    return results
+
+
+def error_rate(stats):
+    return stats.get("errors", 0) / stats["requests"] if stats.get("requests") else 0.0
+
+
+def compare(results, baseline, threshold):
+    """List the scenarios that regressed by more than ``threshold``.
+
+    Any error rate above the baseline's (or any error, for a scenario
+    without a baseline) is a regression too, a run answering 503 fast is
+    not an improvement.
+    """
+    regressions = []
+    for mode, scenarios in results.items():
+        for name, current in scenarios.items():
+            previous = baseline.get(mode, {}).get(name)
+            before = error_rate(previous) if previous is not None else 0.0
+            if error_rate(current) > before:
+                regressions.append(
+                    f"{mode}/{name}: error rate {before:.1%} -> "
+                    f"{error_rate(current):.1%}"
+                )
+            if previous is None:
+                continue
+            if current["p99_ms"] > previous["p99_ms"] * (1 + threshold):
+                regressions.append(
+                    f"{mode}/{name}: p99 {previous['p99_ms']:.2f} -> "
+                    f"{current['p99_ms']:.2f} ms"
+                )
+            if current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold):
+                regressions.append(
+                    f"{mode}/{name}: throughput {previous['throughput_rps']:.0f} -> "
+                    f"{current['throughput_rps']:.0f} req/s"
+                )
+    return regressions
+
+
+def print_report(results):
+    print(
+        f"{'scenario':<32} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} "
+        f"{'p99 ms':>9} {'errors':>7}"
+    )
+    for mode, scenarios in results.items():
+        for name, stats in scenarios.items():
+            print(
+                f"{mode + '/' + name:<32} {stats['throughput_rps']:>10.1f} "
+                f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+                f"{stats['p99_ms']:>9.2f} {stats['errors']:>7}"
+            )
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=MODES + ("all",), default="all")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenario", action="append", help="run only these")
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    scenarios = [
+        scenario
+        for scenario in SCENARIOS
+        if not args.scenario or scenario["name"] in args.scenario
+    ]
+    modes = MODES if args.mode == "all" else (args.mode,)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        settings = make_workdir(Path(directory))
+        # uvicorn first: the in-process run imports the app into this process
+        if "uvicorn" in modes:
+            results["uvicorn"] = asyncio.run(
+                run_uvicorn(settings, scenarios, args.requests, args.concurrency)
+            )
+        if "inprocess" in modes:
+            results["inprocess"] = asyncio.run(
+                run_inprocess(settings, scenarios, args.requests, args.concurrency)
+            )
+    print_report(results)
+    report = {
+        "meta": {
+            "created_at": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
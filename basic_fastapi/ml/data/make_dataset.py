@@ -1,23 +1,122 @@
 # -*- coding: utf-8 -*-
 import click
+import os
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
 from loguru import logger
 from dotenv import find_dotenv, load_dotenv
 
+from ml.partitions import FEATURES, LABEL, Manifest, file_hash, remove, run_jobs
 
-def pipeline():
+RAW_PATTERNS = ("*.csv", "*.csv.gz")
+
+
+def partition_name(key):
+    """``sales.2024.csv.gz`` -> ``source=sales.2024``."""
+    for pattern in sorted(RAW_PATTERNS, key=len, reverse=True):
+        suffix = pattern.lstrip("*")
+        if key.endswith(suffix):
+            return f"source={key[: -len(suffix)]}"
+    return f"source={key}"
+
+
+def clean_chunk(chunk):
+    """Keep numeric feature (and label) columns, drop incomplete rows."""
+    missing = [name for name in FEATURES if name not in chunk.columns]
+    if missing:
+        raise ValueError(f"raw data is missing columns {missing}")
+    columns = FEATURES + ([LABEL] if LABEL in chunk.columns else [])
+    frame = chunk[columns].apply(pd.to_numeric, errors="coerce")
+    keep = np.isfinite(frame.to_numpy(dtype=np.float64)).all(axis=1)
+    frame = frame[keep]
+    frame[FEATURES] = frame[FEATURES].astype(np.float64)
+    if LABEL in frame:
+        frame[LABEL] = frame[LABEL].astype(np.int64)
+    return frame
+
+
+def clean_file(raw_path, partition_dir, chunk_rows):
+    """Stream one raw file into ``part-NNNNN.parquet`` files of ``chunk_rows``.
+
+    Parts are written to a temporary directory swapped in at the end, so an
+    interrupted run never leaves a half-written partition behind.
+    """
+    partition_dir = Path(partition_dir)
+    tmp_dir = partition_dir.with_name(f"{partition_dir.name}.{os.getpid()}.tmp")
+    remove(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+    rows = 0
+    for index, chunk in enumerate(pd.read_csv(raw_path, chunksize=chunk_rows)):
+        frame = clean_chunk(chunk)
+        frame.to_parquet(tmp_dir / f"part-{index:05d}.parquet", index=False)
+        rows += len(frame)
+    remove(partition_dir)
+    os.replace(tmp_dir, partition_dir)
+    return rows
+
+
+def pipeline(input_filepath, output_filepath, chunk_rows=100_000, workers=None):
+    """Clean every raw CSV into its own ``source=<name>`` Parquet partition.
+
+    Raw files are cleaned in parallel, each one streamed in ``chunk_rows``
+    chunks so memory does not grow with the file. Files whose content hash
+    matches the manifest are skipped and partitions of deleted files are
+    removed.
+    """
     logger.info("Start making dataset.")
+    input_dir, output_dir = Path(input_filepath), Path(output_filepath)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = Manifest(output_dir)
+    raw_files = sorted(
+        path for pattern in RAW_PATTERNS for path in input_dir.glob(pattern)
+    )
+    sources = {}
+    for raw_path in raw_files:
+        other = sources.setdefault(partition_name(raw_path.name), raw_path.name)
+        if other != raw_path.name:
+            raise ValueError(
+                f"raw files {other} and {raw_path.name} would share a partition"
+            )
+    jobs, digests, skipped = [], {}, 0
+    for raw_path in raw_files:
+        key = raw_path.name
+        partition_dir = output_dir / partition_name(key)
+        digests[key] = file_hash(raw_path)
+        if manifest.is_current(key, digests[key], partition_dir):
+            skipped += 1
+            continue
+        jobs.append((raw_path, partition_dir, chunk_rows))
+
+    rows = run_jobs(clean_file, jobs, workers)
+    for raw_path, *_ in jobs:
+        manifest.entries[raw_path.name] = digests[raw_path.name]
+    removed = [key for key in manifest.entries if key not in digests]
+    for key in removed:
+        # e.g. a.csv replaced by a.csv.gz, which was just rebuilt in place
+        if partition_name(key) not in sources:
+            remove(output_dir / partition_name(key))
+        del manifest.entries[key]
+    manifest.save()
+    logger.info(
+        f"built {len(jobs)} partitions ({sum(rows)} rows), "
+        f"skipped {skipped}, removed {len(removed)}"
+    )
+    return {"built": len(jobs), "skipped": skipped, "removed": len(removed)}
 
 
 @click.command()
 @click.argument("input_filepath", default="data/raw", type=click.Path(exists=True))
 @click.argument("output_filepath", default="data/interim", type=click.Path())
-def main(input_filepath, output_filepath):
+@click.option("--chunk-rows", default=100_000, show_default=True)
+@click.option("--workers", default=None, type=int, help="defaults to the CPU count")
+def main(input_filepath, output_filepath, chunk_rows, workers):
     """Runs data processing scripts to turn raw data from (../raw) into
-    cleaned data ready to be analyzed (saved in ../processed).
+    cleaned data ready to be analyzed (saved in ../interim).
     """
     logger.info(f"Read from {input_filepath}, write to {output_filepath}.")
+    pipeline(input_filepath, output_filepath, chunk_rows, workers)
 
 
 if __name__ == "__main__":
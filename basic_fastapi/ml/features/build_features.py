@@ -1,23 +1,83 @@
 # -*- coding: utf-8 -*-
 import click
+import os
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
 from loguru import logger
 from dotenv import find_dotenv, load_dotenv
 
+from ml.partitions import FEATURES, Manifest, file_hash, remove, run_jobs
 
-def pipeline():
+
+def add_features(frame):
+    """Row-wise summary columns next to the model features, vectorized."""
+    values = frame[FEATURES].to_numpy(dtype=np.float64)
+    frame = frame.copy()
+    frame["row_mean"] = values.mean(axis=1)
+    frame["row_std"] = values.std(axis=1)
+    frame["row_min"] = values.min(axis=1)
+    frame["row_max"] = values.max(axis=1)
+    return frame
+
+
+def build_part(input_path, output_path):
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    frame = add_features(pd.read_parquet(input_path))
+    tmp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+    frame.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
+    return len(frame)
+
+
+def pipeline(input_filepath, output_filepath, workers=None):
+    """Build features for every interim part on a process pool.
+
+    Output keeps the ``source=<name>/part-NNNNN.parquet`` layout of the
+    input. Parts whose input hash matches the manifest are skipped, outputs
+    of parts that disappeared are removed.
+    """
     logger.info("Start building features.")
+    input_dir, output_dir = Path(input_filepath), Path(output_filepath)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = Manifest(output_dir)
+    jobs, digests, skipped = [], {}, 0
+    for input_path in sorted(input_dir.glob("source=*/part-*.parquet")):
+        key = input_path.relative_to(input_dir).as_posix()
+        digests[key] = file_hash(input_path)
+        if manifest.is_current(key, digests[key], output_dir / key):
+            skipped += 1
+            continue
+        jobs.append((input_path, output_dir / key))
+
+    rows = run_jobs(build_part, jobs, workers)
+    for input_path, _ in jobs:
+        key = input_path.relative_to(input_dir).as_posix()
+        manifest.entries[key] = digests[key]
+    removed = [key for key in manifest.entries if key not in digests]
+    for key in removed:
+        remove(output_dir / key)
+        del manifest.entries[key]
+    manifest.save()
+    logger.info(
+        f"built {len(jobs)} parts ({sum(rows)} rows), "
+        f"skipped {skipped}, removed {len(removed)}"
+    )
+    return {"built": len(jobs), "skipped": skipped, "removed": len(removed)}
 
 
 @click.command()
 @click.argument("input_filepath", default="data/interim", type=click.Path(exists=True))
 @click.argument("output_filepath", default="data/processed", type=click.Path())
-def main(input_filepath, output_filepath):
+@click.option("--workers", default=None, type=int, help="defaults to the CPU count")
+def main(input_filepath, output_filepath, workers):
     """Runs data processing scripts to turn cleaned data from (../interim) into
     training data ready to be trained (saved in ../processed).
     """
     logger.info(f"Read from {input_filepath}, write to {output_filepath}.")
+    pipeline(input_filepath, output_filepath, workers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+import click
+import os
+from pathlib import Path
+
+import joblib
+import numpy as np
+from loguru import logger
+from dotenv import find_dotenv, load_dotenv
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sqlalchemy import column, create_engine, select, table
+
+from ml.partitions import FEATURES
+
+TARGET = "prediction"
+STATE = ("last_id", "rows", "scaler", "model", "classes")
+prediction_logs = table(
+    "prediction_logs",
+    column("id"),
+    *(column(name) for name in FEATURES),
+    column(TARGET),
+)
+
+
+def iter_chunks(engine, after_id, chunk_rows):
+    """Yield ``(last_id, features, targets)`` for rows past ``after_id``.
+
+    Rows are read by keyset on ``id``, one chunk in memory at a time.
+    """
+    columns = [prediction_logs.c[name] for name in FEATURES]
+    while True:
+        statement = (
+            select(prediction_logs.c.id, *columns, prediction_logs.c[TARGET])
+            .where(prediction_logs.c.id > after_id)
+            .order_by(prediction_logs.c.id)
+            .limit(chunk_rows)
+        )
+        with engine.connect() as connection:
+            rows = np.array(connection.execute(statement).all(), dtype=np.float64)
+        if not len(rows):
+            return
+        after_id = int(rows[-1, 0])
+        yield after_id, rows[:, 1:-1], rows[:, -1].astype(np.int64)
+
+
+class Checkpoint(object):
+    """Estimator state and the last log row it learned from.
+
+    Saved with an atomic replace after every chunk, so a killed run resumes
+    from the last finished chunk and a later run only reads new rows.
+    """
+
+    def __init__(self, path, classes):
+        self.path = Path(path)
+        self.last_id = 0
+        self.rows = 0
+        self.scaler = StandardScaler()
+        self.model = SGDClassifier(loss="log_loss", random_state=0)
+        self.classes = np.asarray(classes)
+        if self.path.exists():
+            state = joblib.load(self.path)
+            for key in STATE:
+                setattr(self, key, state[key])
+
+    def update(self, last_id, features, targets):
+        self.scaler.partial_fit(features)
+        self.model.partial_fit(
+            self.scaler.transform(features), targets, classes=self.classes
+        )
+        self.last_id = last_id
+        self.rows += len(targets)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        state = {key: getattr(self, key) for key in STATE}
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        joblib.dump(state, tmp_path)
+        os.replace(tmp_path, self.path)
+
+
+def write_model(checkpoint, model_dir, model_name, version):
+    """Write the estimator as ``<model_dir>/<version>/<model_name>``.
+
+    That is the layout the service's model registry loads versions from, so
+    it can be served with ``?model=<version>``, a traffic split or as the
+    shadow model.
+    """
+    path = Path(model_dir) / version / model_name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    joblib.dump(make_pipeline(checkpoint.scaler, checkpoint.model), tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def train(
+    database_url,
+    model_dir,
+    model_name="model.pkl",
+    checkpoint_path="data/checkpoints/train_model.pkl",
+    chunk_rows=10_000,
+    classes=(0, 1),
+    version=None,
+):
+    """Update the incremental model with log rows added since the checkpoint.
+
+    The target is the served ``prediction`` of each logged request, so the
+    new model learns the live traffic distribution of the current one.
+    Returns the path of the new model, ``None`` when there were no new rows.
+    """
+    engine = create_engine(database_url)
+    checkpoint = Checkpoint(checkpoint_path, classes)
+    started_id, new_rows = checkpoint.last_id, 0
+    for last_id, features, targets in iter_chunks(
+        engine, checkpoint.last_id, chunk_rows
+    ):
+        checkpoint.update(last_id, features, targets)
+        checkpoint.save()
+        new_rows += len(targets)
+    engine.dispose()
+    if not new_rows:
+        logger.info(f"no log rows after id {started_id}, model unchanged")
+        return None
+    path = write_model(
+        checkpoint,
+        model_dir,
+        model_name,
+        version or f"incremental-{checkpoint.last_id}",
+    )
+    logger.info(
+        f"learned {new_rows} new rows ({checkpoint.rows} in total) "
+        f"up to id {checkpoint.last_id}, wrote {path}"
+    )
+    return path
+
+
+@click.command()
+@click.option("--database-url", default="sqlite:///./app.db", show_default=True)
+@click.option("--model-dir", default="ml/model", show_default=True)
+@click.option("--model-name", default="model.pkl", show_default=True)
+@click.option(
+    "--checkpoint", default="data/checkpoints/train_model.pkl", show_default=True
+)
+@click.option("--chunk-rows", default=10_000, show_default=True)
+@click.option("--classes", default="0,1", show_default=True)
+@click.option("--version", default=None, help="defaults to incremental-<last id>")
+def main(database_url, model_dir, model_name, checkpoint, chunk_rows, classes, version):
+    """Trains the served model incrementally from the logged predictions
+    (prediction_logs) and writes it as a new version in the model directory.
+    """
+    logger.info(f"Read from {database_url}, write to {model_dir}.")
+    train(
+        database_url,
+        model_dir,
+        model_name,
+        checkpoint,
+        chunk_rows,
+        [int(value) for value in classes.split(",")],
+        version,
+    )
+
+
+if __name__ == "__main__":
+
+    load_dotenv(find_dotenv())
+
+    # pylint: disable = no-value-for-paramete
+    main()
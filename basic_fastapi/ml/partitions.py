@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+FEATURES = [f"feature{i}" for i in range(1, 6)]
+LABEL = "label"
+MANIFEST = "_manifest.json"
+
+
+def file_hash(path):
+    """Sha256 of a file, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as data_file:
+        for block in iter(lambda: data_file.read(2**20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest(object):
+    """Input hash of every partition written to ``directory``.
+
+    A stage rebuilds a partition only when the hash of its input changed or
+    its output is missing, so reruns cost as much as the new data.
+    """
+
+    def __init__(self, directory):
+        self.path = Path(directory) / MANIFEST
+        self.entries = {}
+        if self.path.exists():
+            self.entries = json.loads(self.path.read_text())
+
+    def is_current(self, key, digest, output):
+        return self.entries.get(key) == digest and Path(output).exists()
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(self.entries, indent=2, sort_keys=True))
+        os.replace(tmp_path, self.path)
+
+
+def remove(path):
+    path = Path(path)
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+
+
+def run_jobs(fn, jobs, workers=None):
+    """Run ``fn(*job)`` for every job, on a process pool unless ``workers`` is 1."""
+    jobs = list(jobs)
+    if workers == 1 or len(jobs) <= 1:
+        return [fn(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fn, *job) for job in jobs]
+        return [future.result() for future in futures]
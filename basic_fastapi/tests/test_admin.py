@@ -0,0 +1,92 @@
+import json
+
+import joblib
+import pytest
+from fastapi.testclient import TestClient
+
+import services.predict as predict
+from main import get_application
+from api.routes import admin, predictor
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class ConstantModel:
+    def __init__(self, value):
+        self.value = value
+
+    def predict(self, data):
+        return [self.value] * len(data)
+
+
+class BrokenModel:
+    def predict(self, data):
+        raise ValueError("broken")
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    example = tmp_path / "example.json"
+    example.write_text(json.dumps({f"feature{i}": 1.0 for i in range(1, 6)}))
+    monkeypatch.setattr(predictor, "INPUT_EXAMPLE", str(example))
+    monkeypatch.setattr("api.routes.admin.INPUT_EXAMPLE", str(example))
+    monkeypatch.setattr(predictor, "load_wrapper", joblib.load)
+    monkeypatch.setattr(predict, "MODEL_PATH", str(tmp_path))
+    monkeypatch.setattr(predict, "MODEL_NAME", "model.pkl")
+    handler = predict.MachineLearningModelHandlerScore
+    for attribute in ("model", "version", "loaded_at", "reload_seconds"):
+        monkeypatch.setattr(handler, attribute, getattr(handler, attribute))
+    return TestClient(get_application())
+
+
+def test_reload_swaps_model_and_reports_version(client, tmp_path):
+    joblib.dump(ConstantModel(1), tmp_path / "model.pkl")
+    first = client.post("/api/v1/admin/model/reload")
+    assert first.status_code == 200
+    assert predict.MachineLearningModelHandlerScore.model.value == 1
+
+    joblib.dump(ConstantModel(0), tmp_path / "model.pkl")
+    second = client.post("/api/v1/admin/model/reload")
+    assert second.status_code == 200
+    assert predict.MachineLearningModelHandlerScore.model.value == 0
+    assert second.json()["version"] != first.json()["version"]
+    assert second.json()["reload_seconds"] >= 0
+    assert client.get("/api/v1/admin/model").json() == second.json()
+
+
+def test_reload_keeps_current_model_when_warmup_fails(client, tmp_path):
+    joblib.dump(ConstantModel(1), tmp_path / "model.pkl")
+    client.post("/api/v1/admin/model/reload")
+    current = predict.MachineLearningModelHandlerScore.model
+
+    joblib.dump(BrokenModel(), tmp_path / "model.pkl")
+    response = client.post("/api/v1/admin/model/reload")
+
+    assert response.status_code == 500
+    assert predict.MachineLearningModelHandlerScore.model is current
+
+
+def test_reload_missing_model(client):
+    response = client.post("/api/v1/admin/model/reload")
+    assert response.status_code == 500
+
+
+@pytest.mark.anyio
+async def test_watcher_reloads_changed_model_file(client, tmp_path):
+    joblib.dump(ConstantModel(1), tmp_path / "model.pkl")
+    client.post("/api/v1/admin/model/reload")
+    watcher = admin.model_watcher
+    watcher._signature = watcher._stat()
+    assert await watcher.poll() is False
+
+    joblib.dump(ConstantModel(0), tmp_path / "model.pkl")
+    assert await watcher.poll() is True
+    assert predict.MachineLearningModelHandlerScore.model.value == 0
+
+    joblib.dump(BrokenModel(), tmp_path / "model.pkl")
+    assert await watcher.poll() is False
+    assert watcher.failures == 1
+    assert predict.MachineLearningModelHandlerScore.model.value == 0
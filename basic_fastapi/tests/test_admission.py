@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.routes.predictor as predictor
+from main import get_application
+from services.admission import AdmissionController, Overloaded
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+async def hold(admission, release, order, name, priority=False):
+    async with admission.admit(priority):
+        order.append(name)
+        await release.wait()
+
+
+@pytest.mark.anyio
+async def test_full_queue_is_shed_with_retry_after():
+    admission = AdmissionController(max_concurrency=1, max_queue=1)
+    admission.service_time = 2.5
+    release = asyncio.Event()
+    order = []
+    tasks = [
+        asyncio.ensure_future(hold(admission, release, order, name))
+        for name in ("running", "queued")
+    ]
+    await asyncio.sleep(0)
+
+    with pytest.raises(Overloaded) as err:
+        async with admission.admit():
+            pass
+    assert err.value.retry_after == 5
+    release.set()
+    await asyncio.gather(*tasks)
+    assert order == ["running", "queued"]
+    assert admission.stats()["shed"] == 1
+    assert admission.stats()["running"] == 0
+
+
+@pytest.mark.anyio
+async def test_deadline_refuses_estimated_and_actual_waits():
+    admission = AdmissionController(max_concurrency=1, max_queue=10, deadline=0.05)
+    release = asyncio.Event()
+    running = asyncio.ensure_future(hold(admission, release, [], "running"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(Overloaded):
+        async with admission.admit():
+            pass
+    assert admission.timeouts == 1
+    admission.service_time = 1.0
+    with pytest.raises(Overloaded, match="estimated wait"):
+        async with admission.admit():
+            pass
+    release.set()
+    await running
+    assert admission.stats()["waiting"] == 0
+
+
+@pytest.mark.anyio
+async def test_priority_lane_goes_first_and_is_never_shed():
+    admission = AdmissionController(max_concurrency=1, max_queue=1)
+    release = asyncio.Event()
+    order = []
+    tasks = [asyncio.ensure_future(hold(admission, release, order, "running"))]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.ensure_future(hold(admission, release, order, "queued")))
+    await asyncio.sleep(0)
+    tasks += [
+        asyncio.ensure_future(hold(admission, release, order, name, priority=True))
+        for name in ("health1", "health2")
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert order == ["running", "health1", "health2", "queued"]
+    assert admission.shed == 0
+
+
+def test_predict_answers_503_with_retry_after(monkeypatch):
+    async def overloaded(*args, **kwargs):
+        raise Overloaded("overloaded: busy", retry_after=3)
+
+    monkeypatch.setattr(predictor, "score", overloaded)
+    monkeypatch.setattr(predictor, "PREDICTION_COALESCE_FLAG", False)
+    client = TestClient(get_application())
+    payload = {f"feature{i}": 1.0 for i in range(1, 6)}
+
+    response = client.post("/api/v1/predict", json=payload)
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "3"
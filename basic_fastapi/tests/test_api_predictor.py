@@ -1,3 +1,4 @@
+import asyncio
 import json
 import pytest
 from fastapi.testclient import TestClient
@@ -63,3 +64,113 @@ def test_health_endpoint_failure(client, monkeypatch):
     monkeypatch.setattr(predictor, "INPUT_EXAMPLE", "missing.json")
     response = client.get("/api/v1/health")
     assert response.status_code == 404
+
+
+def test_predict_batch_single_model_call(client, monkeypatch):
+    calls = []
+
+    def fake_prediction(data):
+        calls.append(data.shape)
+        return [1] * len(data)
+
+    monkeypatch.setattr(predictor, "get_prediction", fake_prediction)
+    response = client.post("/api/v1/predict/batch", json=[sample_payload()] * 3)
+    assert response.status_code == 200
+    assert calls == [(3, 5)]
+    assert response.json() == {
+        "predictions": [{"prediction": 1.0, "prediction_label": "label ok"}] * 3
+    }
+
+
+def test_predict_batch_empty(client):
+    response = client.post("/api/v1/predict/batch", json=[])
+    assert response.status_code == 404
+
+
+def test_predict_batch_too_large(client, monkeypatch):
+    monkeypatch.setattr(predictor, "BATCH_MAX_SIZE", 2)
+    response = client.post("/api/v1/predict/batch", json=[sample_payload()] * 3)
+    assert response.status_code == 413
+
+
+def test_predict_batch_length_mismatch(client, monkeypatch):
+    monkeypatch.setattr(predictor, "get_prediction", lambda data: [1])
+    response = client.post("/api/v1/predict/batch", json=[sample_payload()] * 2)
+    assert response.status_code == 500
+
+
+def test_predict_cache_skips_model_call(client, monkeypatch):
+    calls = []
+
+    def fake_prediction(data):
+        calls.append(data)
+        return [1]
+
+    monkeypatch.setattr(predictor, "PREDICTION_CACHE_FLAG", True)
+    monkeypatch.setattr(predictor, "prediction_cache", predictor.PredictionCache())
+    monkeypatch.setattr(predictor, "get_prediction", fake_prediction)
+    for _ in range(3):
+        response = client.post("/api/v1/predict", json=sample_payload())
+        assert response.json() == {"prediction": 1.0, "prediction_label": "label ok"}
+
+    assert len(calls) == 1
+    stats = client.get("/api/v1/cache/stats").json()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_liveness_does_not_touch_model(client, monkeypatch):
+    def raise_error(data):
+        raise ValueError("fail")
+
+    monkeypatch.setattr(predictor, "get_prediction", raise_error)
+    response = client.get("/api/v1/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": True}
+
+
+@pytest.mark.anyio
+async def test_readiness_serves_cached_verdict(monkeypatch, tmp_path):
+    example = tmp_path / "example.json"
+    example.write_text(json.dumps(sample_payload()))
+    calls = []
+    monkeypatch.setattr(predictor, "INPUT_EXAMPLE", str(example))
+    monkeypatch.setattr(predictor, "get_prediction", lambda data: calls.append(data))
+    monitor = predictor.HealthMonitor(
+        lambda data: predictor.get_prediction(data), interval=60
+    )
+    monkeypatch.setattr(predictor, "health_monitor", monitor)
+
+    for _ in range(3):
+        response = await predictor.health()
+        assert response.status is True
+    await monitor.stop()
+
+    assert len(calls) == 1
+    assert monitor.verdict is True
+
+
+@pytest.mark.anyio
+async def test_started_monitor_checks_before_first_probe(monkeypatch, tmp_path):
+    example = tmp_path / "example.json"
+    example.write_text(json.dumps(sample_payload()))
+    outcomes = [ValueError("warming"), None]
+    calls = []
+
+    def flaky(data):
+        calls.append(data)
+        outcome = outcomes.pop(0) if outcomes else None
+        if outcome is not None:
+            raise outcome
+
+    monitor = predictor.HealthMonitor(flaky, interval=60, retry_interval=0.01)
+    await monitor.start(str(example))
+    for _ in range(100):
+        if monitor.verdict:
+            break
+        await asyncio.sleep(0.01)
+    ready = await monitor.is_ready(str(example))
+    await monitor.stop()
+
+    assert ready is True
+    assert len(calls) == 2
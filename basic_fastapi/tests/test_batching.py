@@ -0,0 +1,90 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+import api.routes.predictor as predictor
+from models.prediction import MachineLearningDataInput
+from services.batching import MicroBatcher
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def sample_payload(value=1.0):
+    return {f"feature{i}": value for i in range(1, 6)}
+
+
+@pytest.mark.anyio
+async def test_concurrent_requests_share_one_model_call():
+    calls = []
+
+    def predict_fn(data_points):
+        calls.append(data_points.shape)
+        return data_points[:, 0]
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=8, max_wait_ms=50)
+    points = [np.array([[float(i)] * 5]) for i in range(4)]
+    results = await asyncio.gather(*(batcher.submit(point) for point in points))
+    await batcher.stop()
+
+    assert calls == [(4, 5)]
+    assert [float(result[0]) for result in results] == [0.0, 1.0, 2.0, 3.0]
+    stats = batcher.stats()
+    assert stats["requests"] == 4
+    assert stats["batches"] == 1
+    assert stats["batch_size_max"] == 4
+    assert stats["latency_p99_ms"] >= stats["latency_p50_ms"] >= 0
+
+
+@pytest.mark.anyio
+async def test_max_batch_size_splits_batches():
+    calls = []
+
+    def predict_fn(data_points):
+        calls.append(len(data_points))
+        return np.zeros(len(data_points))
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=2, max_wait_ms=50)
+    points = [np.ones((1, 5)) for _ in range(5)]
+    await asyncio.gather(*(batcher.submit(point) for point in points))
+    await batcher.stop()
+
+    assert sorted(calls) == [1, 2, 2]
+
+
+@pytest.mark.anyio
+async def test_model_error_fans_out_to_every_caller():
+    def predict_fn(data_points):
+        raise ValueError("fail")
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=4, max_wait_ms=10)
+    results = await asyncio.gather(
+        *(batcher.submit(np.ones((1, 5))) for _ in range(3)), return_exceptions=True
+    )
+    await batcher.stop()
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.anyio
+async def test_predict_uses_batcher_when_enabled(monkeypatch):
+    calls = []
+
+    def fake_prediction(data_points):
+        calls.append(len(data_points))
+        return [1] * len(data_points)
+
+    monkeypatch.setattr(predictor, "MICRO_BATCHING_FLAG", True)
+    monkeypatch.setattr(predictor, "get_prediction", fake_prediction)
+    monkeypatch.setattr(predictor, "log_requests", lambda *args: None)
+    data = [MachineLearningDataInput(**sample_payload(i)) for i in range(3)]
+
+    responses = await asyncio.gather(*(predictor.predict(d) for d in data))
+    await predictor.batcher.stop()
+
+    assert [r.prediction_label for r in responses] == ["label ok"] * 3
+    assert sum(calls) == 3
+    assert len(calls) < 3
@@ -0,0 +1,56 @@
+import asyncio
+
+from api.routes import predictor
+from benchmarks import bench_decode
+from benchmarks.load import compare, summarize
+
+
+def stats(p99_ms, throughput_rps, errors=0):
+    return {
+        "p99_ms": p99_ms,
+        "throughput_rps": throughput_rps,
+        "requests": 100,
+        "errors": errors,
+    }
+
+
+def test_summarize_percentiles():
+    summary = summarize([0.001 * i for i in range(1, 101)], errors=2, seconds=2.0)
+    assert summary["requests"] == 100
+    assert summary["throughput_rps"] == 50.0
+    assert summary["p50_ms"] == 50.5
+    assert summary["errors"] == 2
+
+
+def test_compare_flags_only_regressions_past_threshold():
+    baseline = {"inprocess": {"a": stats(10, 100), "b": stats(10, 100)}}
+    results = {
+        "inprocess": {"a": stats(11, 95), "b": stats(13, 70), "new": stats(1, 1)}
+    }
+    regressions = compare(results, baseline, threshold=0.2)
+    assert len(regressions) == 2
+    assert all(regression.startswith("inprocess/b") for regression in regressions)
+
+
+def test_compare_flags_errors_even_when_faster():
+    baseline = {"inprocess": {"a": stats(10, 100), "b": stats(10, 100, errors=5)}}
+    results = {
+        "inprocess": {
+            "a": stats(1, 1000, errors=100),
+            "b": stats(10, 100, errors=5),
+            "new": stats(1, 1, errors=1),
+        }
+    }
+    regressions = compare(results, baseline, threshold=0.2)
+    assert [regression.split(":")[0] for regression in regressions] == [
+        "inprocess/a",
+        "inprocess/new",
+    ]
+
+
+def test_bench_decode_runs(monkeypatch, capsys):
+    # the benchmark stubs these out for the whole process
+    monkeypatch.setattr(predictor, "get_prediction", predictor.get_prediction)
+    monkeypatch.setattr(predictor, "log_requests", predictor.log_requests)
+    asyncio.run(bench_decode.run(row_counts=(1,), repeat=1, budget_rows=1))
+    assert capsys.readouterr().out.splitlines()[1].split()[0] == "1"
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+import api.routes.predictor as predictor
+from models.prediction import MachineLearningDataInput
+from services.coalescing import SingleFlight
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def sample_payload(value=1.0):
+    return {f"feature{i}": value for i in range(1, 6)}
+
+
+@pytest.mark.anyio
+async def test_identical_keys_share_one_call():
+    calls = []
+    release = asyncio.Event()
+
+    async def fn(value):
+        calls.append(value)
+        await release.wait()
+        return value * 10
+
+    flight = SingleFlight()
+    waiting = [
+        asyncio.ensure_future(flight.run(key, lambda key=key: fn(key)))
+        for key in (1, 1, 1, 2)
+    ]
+    await asyncio.sleep(0)
+    assert flight.stats()["in_flight"] == 2
+    release.set()
+
+    assert await asyncio.gather(*waiting) == [10, 10, 10, 20]
+    assert calls == [1, 2]
+    assert flight.stats() == {
+        "in_flight": 0,
+        "calls": 2,
+        "coalesced": 2,
+        "coalesced_ratio": 0.5,
+    }
+
+
+@pytest.mark.anyio
+async def test_errors_fan_out_and_cancelled_caller_keeps_call_running():
+    release = asyncio.Event()
+
+    async def fn():
+        await release.wait()
+        raise ValueError("fail")
+
+    flight = SingleFlight()
+    first = asyncio.ensure_future(flight.run("key", fn))
+    second = asyncio.ensure_future(flight.run("key", fn))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    with pytest.raises(ValueError):
+        await second
+    assert first.cancelled()
+    assert flight.stats()["in_flight"] == 0
+
+
+@pytest.mark.anyio
+async def test_predict_coalesces_identical_inputs(monkeypatch):
+    calls = []
+
+    def fake_prediction(data_point):
+        calls.append(data_point.tolist())
+        return [1]
+
+    monkeypatch.setattr(predictor, "PREDICTION_COALESCE_FLAG", True)
+    monkeypatch.setattr(predictor, "MICRO_BATCHING_FLAG", False)
+    monkeypatch.setattr(predictor, "get_prediction", fake_prediction)
+    monkeypatch.setattr(predictor, "log_requests", lambda *args: None)
+    monkeypatch.setattr(predictor, "coalescer", SingleFlight())
+    data = [MachineLearningDataInput(**sample_payload(value)) for value in (1, 1, 2)]
+
+    responses = await asyncio.gather(*(predictor.predict(d) for d in data))
+
+    assert [r.prediction_label for r in responses] == ["label ok"] * 3
+    assert len(calls) == 2
+    assert predictor.coalescer.stats()["coalesced"] == 1
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.routes import predictor
+from main import get_application
+from services.codec import DecodeError, decode_rows
+
+
+def sample_payload(value=1.0):
+    return {f"feature{i}": value for i in range(1, 6)}
+
+
+def test_decode_single_object():
+    data_points, rows, single = decode_rows(json.dumps(sample_payload(2)).encode())
+    assert single is True
+    assert data_points.shape == (1, 5)
+    assert data_points.tolist() == [[2.0] * 5]
+    assert rows == [sample_payload(2)]
+
+
+def test_decode_list_of_objects():
+    body = json.dumps([sample_payload(1), sample_payload(2.5)]).encode()
+    data_points, _, single = decode_rows(body)
+    assert single is False
+    assert data_points.tolist() == [[1.0] * 5, [2.5] * 5]
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"feature1": 1.0},
+        dict(sample_payload(), feature3="1.0"),
+        dict(sample_payload(), feature3=True),
+        [1, 2],
+        "text",
+    ],
+)
+def test_decode_rejects_invalid_rows(payload):
+    with pytest.raises(DecodeError):
+        decode_rows(json.dumps(payload).encode())
+
+
+def test_decode_rejects_invalid_json():
+    with pytest.raises(DecodeError):
+        decode_rows(b"{not json")
+
+
+def test_predict_fast_matches_pydantic_endpoints(monkeypatch):
+    monkeypatch.setattr(predictor, "get_prediction", lambda data: [1] * len(data))
+    monkeypatch.setattr(predictor, "log_requests", lambda *args: None)
+    client = TestClient(get_application())
+
+    single = client.post("/api/v1/predict/fast", json=sample_payload())
+    assert single.json() == client.post("/api/v1/predict", json=sample_payload()).json()
+
+    rows = [sample_payload(), sample_payload(2)]
+    batch = client.post("/api/v1/predict/fast", json=rows)
+    assert batch.json() == client.post("/api/v1/predict/batch", json=rows).json()
+
+    invalid = client.post("/api/v1/predict/fast", json={"feature1": 1})
+    assert invalid.status_code == 422
@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import db
+from models.log import RequestLog
+from models.prediction import MachineLearningResponse
+from services.log_writer import RequestLogWriter
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def test_engine_options_wire_pool_settings(monkeypatch):
+    monkeypatch.setattr(db, "MIN_CONNECTIONS_COUNT", 5)
+    monkeypatch.setattr(db, "MAX_CONNECTIONS_COUNT", 15)
+    options = db.engine_options("postgresql://user@host/app")
+    assert options["pool_size"] == 5
+    assert options["max_overflow"] == 10
+    assert "pool_size" not in db.engine_options("sqlite://")
+
+
+def test_async_url():
+    assert db.async_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert db.async_url("postgresql://u@h/db") == "postgresql+asyncpg://u@h/db"
+
+
+def test_sqlite_file_uses_wal(tmp_path):
+    engine, _ = db.create_engines(f"sqlite:///{tmp_path / 'app.db'}")
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+
+
+@pytest.mark.anyio
+async def test_writer_flushes_through_async_session(tmp_path):
+    pytest.importorskip("aiosqlite")
+    engine, async_engine = db.create_engines(
+        f"sqlite:///{tmp_path / 'app.db'}", use_async=True
+    )
+    db.Base.metadata.create_all(bind=engine)
+    sessions = async_sessionmaker(async_engine)
+    writer = RequestLogWriter(None, async_session_factory=sessions)
+    payload = {f"feature{i}": 1.0 for i in range(1, 6)}
+    response = MachineLearningResponse(prediction=1.0, prediction_label="label ok")
+
+    writer.enqueue([(payload, response)])
+    await writer.stop()
+    count = await db.run_session(
+        sessions, lambda session: session.query(RequestLog).count()
+    )
+    await async_engine.dispose()
+
+    assert writer.written == 1
+    assert count == 1
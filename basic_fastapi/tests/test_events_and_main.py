@@ -1,6 +1,14 @@
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
 from fastapi import FastAPI
 from sqlalchemy.exc import OperationalError
 
+from api.routes import admin, predictor
 from core import events
 from main import get_application
 import services.predict as predict
@@ -29,17 +37,120 @@ def test_create_start_app_handler(monkeypatch):
 
     monkeypatch.setattr(events, "preload_model", fake_preload)
 
+    async def fake_start(path, after=None):
+        called["example"] = path
+
     def fake_create_all(*args, **kwargs):
         raise OperationalError("stmt", {}, Exception("db down"))
 
     monkeypatch.setattr(events.Base.metadata, "create_all", fake_create_all)
+    monkeypatch.setattr(predictor.health_monitor, "start", fake_start)
+    monkeypatch.setattr(admin.model_watcher, "interval", 0)
+    monkeypatch.setattr(events, "WARMUP_FLAG", False)
 
     app = FastAPI()
     handler = events.create_start_app_handler(app)
-    handler()
+    asyncio.run(handler())
     assert called.get("called") is True
+    assert called.get("example") == predictor.INPUT_EXAMPLE
+    assert {"database", "model", "health", "watcher", "total"} <= set(
+        events.startup_report
+    )
+
+
+def test_model_load_and_db_init_run_concurrently(monkeypatch):
+    monkeypatch.setattr(events, "MEMOIZATION_FLAG", True)
+    monkeypatch.setattr(events, "preload_model", lambda: time.sleep(0.3))
+    monkeypatch.setattr(events, "init_db", lambda: time.sleep(0.3))
+    monkeypatch.setattr(admin.model_watcher, "interval", 0)
+    monkeypatch.setattr(events, "WARMUP_FLAG", False)
+
+    async def fake_start(path, after=None):
+        pass
+
+    monkeypatch.setattr(predictor.health_monitor, "start", fake_start)
+
+    asyncio.run(events.create_start_app_handler(FastAPI())())
+
+    assert events.startup_report["model"] >= 0.3
+    assert events.startup_report["total"] < 0.55
+
+
+def test_warm_up_runs_every_path(monkeypatch, tmp_path):
+    example = tmp_path / "example.json"
+    example.write_text(json.dumps({f"feature{i}": float(i) for i in range(1, 6)}))
+    shapes = []
+
+    def fake_prediction(data):
+        shapes.append(data.shape)
+        return data[:, 0]
+
+    monkeypatch.setattr(predictor, "INPUT_EXAMPLE", str(example))
+    monkeypatch.setattr(predictor, "get_prediction", fake_prediction)
+    monkeypatch.setattr(events, "MICRO_BATCHING_FLAG", True)
+
+    async def run():
+        try:
+            return await events.warm_up(rounds=2, batch_rows=8)
+        finally:
+            await predictor.batcher.stop()
+
+    report = asyncio.run(run())
+
+    assert set(report) == {"single", "batch", "micro_batch"}
+    assert all(stats["warm_ms"] >= 0 for stats in report.values())
+    assert (1, 5) in shapes and (8, 5) in shapes
+
+
+def test_readiness_waits_for_warm_up(tmp_path):
+    example = tmp_path / "example.json"
+    example.write_text(json.dumps({f"feature{i}": 1.0 for i in range(1, 6)}))
+
+    async def run():
+        warmed = asyncio.Event()
+        monitor = predictor.HealthMonitor(lambda data: None, interval=60)
+        await monitor.start(str(example), asyncio.ensure_future(warmed.wait()))
+        await asyncio.sleep(0.05)
+        before = await monitor.is_ready(str(example))
+        warmed.set()
+        for _ in range(100):
+            if monitor.verdict:
+                break
+            await asyncio.sleep(0.01)
+        after = await monitor.is_ready(str(example))
+        await monitor.stop()
+        return before, after
+
+    assert asyncio.run(run()) == (False, True)
+
+
+def test_app_import_defers_sklearn():
+    app_dir = Path(__file__).resolve().parent.parent / "app"
+    code = (
+        "import sys, main; "
+        "print(any(name in sys.modules for name in ('sklearn', 'pandas', 'pyarrow')))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=app_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert output.stdout.strip() == "False"
 
 
 def test_get_application():
     app = get_application()
     assert isinstance(app, FastAPI)
+
+
+def test_preload_model_reports_memory(monkeypatch):
+    monkeypatch.setattr(
+        predict.MachineLearningModelHandlerScore,
+        "get_model",
+        classmethod(lambda cls, loader: None),
+    )
+    events.preload_model()
+    assert events.model_load_stats["rss_after_bytes"] > 0
+    assert events.model_load_stats["seconds"] >= 0
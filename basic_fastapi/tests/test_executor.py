@@ -0,0 +1,82 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+
+from services.executor import InferenceExecutor
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def double(data_point):
+    return data_point * 2
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("backend", ["inline", "thread", "process"])
+async def test_backends_return_model_output(backend):
+    executor = InferenceExecutor(backend, pool_size=1)
+    try:
+        result = await executor.run(double, np.ones((2, 5)))
+    finally:
+        executor.shutdown()
+    assert result.tolist() == [[2.0] * 5] * 2
+
+
+def test_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        InferenceExecutor("gpu")
+
+
+def crash_worker(data_point):
+    os._exit(1)
+
+
+@pytest.mark.anyio
+async def test_process_pool_is_replaced_after_worker_dies():
+    executor = InferenceExecutor("process", pool_size=1)
+    try:
+        with pytest.raises(BrokenProcessPool):
+            await executor.run(crash_worker, np.ones((1, 5)))
+        result = await executor.run(double, np.ones((1, 5)))
+    finally:
+        executor.shutdown()
+    assert result.tolist() == [[2.0] * 5]
+
+
+def worker_pid(data_point):
+    return os.getpid()
+
+
+@pytest.mark.anyio
+async def test_recycle_warms_new_workers_before_swapping_pools():
+    executor = InferenceExecutor("process", pool_size=1)
+    try:
+        before = await executor.run(worker_pid, np.ones((1, 5)))
+        old_pool = executor._pool
+        await executor.recycle(double, np.ones((1, 5)))
+        new_pool = executor._pool
+        after = await executor.run(worker_pid, np.ones((1, 5)))
+    finally:
+        executor.shutdown()
+    assert new_pool is not old_pool
+    assert after != before
+
+
+@pytest.mark.anyio
+async def test_recycle_keeps_old_pool_when_warm_up_fails():
+    executor = InferenceExecutor("process", pool_size=1)
+    try:
+        await executor.run(double, np.ones((1, 5)))
+        old_pool = executor._pool
+        with pytest.raises(BrokenProcessPool):
+            await executor.recycle(crash_worker, np.ones((1, 5)))
+        assert executor._pool is old_pool
+        result = await executor.run(double, np.ones((1, 5)))
+    finally:
+        executor.shutdown()
+    assert result.tolist() == [[2.0] * 5]
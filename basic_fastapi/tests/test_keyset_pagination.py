@@ -0,0 +1,115 @@
+import base64
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.routes import logs
+from core.paginator import CountCache, InvalidCursor, decode_cursor, keyset_page
+from db import Base
+from main import get_application
+from models.log import RequestLog
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def session_factory(engine):
+    factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    with factory() as db:
+        db.add_all(
+            RequestLog(
+                request=json.dumps({"feature1": float(i)}),
+                response=json.dumps({"prediction": 1.0}),
+            )
+            for i in range(7)
+        )
+        db.commit()
+    return factory
+
+
+@pytest.fixture
+def client(monkeypatch, session_factory):
+    monkeypatch.setattr(logs, "session_factory", session_factory)
+    monkeypatch.setattr(logs, "count_cache", CountCache(ttl=60))
+    return TestClient(get_application())
+
+
+def test_keyset_page_walks_all_rows(session_factory):
+    seen = []
+    cursor = None
+    with session_factory() as db:
+        while True:
+            page = keyset_page(db, select(RequestLog), RequestLog.id, 3, cursor)
+            seen.extend(log.id for log in page["listings"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+    assert seen == list(range(1, 8))
+    assert page["totalCount"] == 7
+
+
+def test_keyset_page_pushes_limit_and_cursor_into_sql(engine, session_factory):
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    with session_factory() as db:
+        first = keyset_page(db, select(RequestLog), RequestLog.id, 2)
+        keyset_page(db, select(RequestLog), RequestLog.id, 2, first["next_cursor"])
+    assert "LIMIT" in statements[0]
+    assert "WHERE request_logs.id >" in statements[2]
+
+
+def test_count_cache_expires():
+    now = [0.0]
+    counts = iter([1, 2])
+    cache = CountCache(ttl=10, clock=lambda: now[0])
+    assert cache.get("q", lambda: next(counts)) == 1
+    now[0] = 5.0
+    assert cache.get("q", lambda: next(counts)) == 1
+    now[0] = 11.0
+    assert cache.get("q", lambda: next(counts)) == 2
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not a cursor")
+
+
+def test_get_logs_pages_with_cursor(client):
+    first = client.get("/api/v1/logs", params={"limit": 5}).json()
+    assert [log["id"] for log in first["listings"]] == [1, 2, 3, 4, 5]
+    assert first["listings"][0]["request"] == {"feature1": 0.0}
+    assert first["total_count"] == 7
+    assert decode_cursor(first["next_cursor"]) == 5
+
+    second = client.get(
+        "/api/v1/logs", params={"limit": 5, "cursor": first["next_cursor"]}
+    ).json()
+    assert [log["id"] for log in second["listings"]] == [6, 7]
+    assert second["next_cursor"] is None
+
+
+def test_get_logs_rejects_invalid_cursor(client):
+    assert client.get("/api/v1/logs", params={"cursor": "nope"}).status_code == 422
+
+
+@pytest.mark.parametrize("value", [{"a": 1}, [1], "5", None])
+def test_get_logs_rejects_cursor_of_wrong_type(client, value):
+    cursor = base64.urlsafe_b64encode(json.dumps({"k": value}).encode()).decode()
+    assert client.get("/api/v1/logs", params={"cursor": cursor}).status_code == 422
@@ -0,0 +1,139 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.routes import logs
+from db import Base
+from main import get_application
+from models.log import PredictionLog, RequestLog
+from models.prediction import MachineLearningResponse
+from services.log_writer import RequestLogWriter
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+def add_rows(session_factory, rows):
+    with session_factory() as db:
+        db.add_all(
+            PredictionLog(
+                created_ms=created_ms,
+                model_version=version,
+                prediction=1.0 if label == "label ok" else 0.0,
+                label=label,
+                **{f"feature{i}": value for i in range(1, 6)},
+            )
+            for created_ms, version, label, value in rows
+        )
+        db.commit()
+
+
+@pytest.fixture
+def client(monkeypatch, session_factory):
+    monkeypatch.setattr(logs, "session_factory", session_factory)
+    add_rows(
+        session_factory,
+        [
+            (1_000, "default", "label ok", 1.0),
+            (2_000, "default", "label nok", 3.0),
+            (61_000, "default", "label ok", 5.0),
+            (62_000, "v2", "label ok", 7.0),
+        ],
+    )
+    return TestClient(get_application())
+
+
+@pytest.mark.parametrize(
+    "log_format, json_rows, columnar_rows",
+    [
+        ("json", 1, 0),
+        ("columnar", 0, 1),
+        ("both", 1, 1),
+    ],
+)
+def test_writer_log_formats(session_factory, log_format, json_rows, columnar_rows):
+    writer = RequestLogWriter(session_factory, log_format=log_format)
+    payload = {f"feature{i}": float(i) for i in range(1, 6)}
+    response = MachineLearningResponse(prediction=1.0, prediction_label="label ok")
+
+    writer.write([(payload, response)], version="v2")
+
+    with session_factory() as db:
+        assert db.query(RequestLog).count() == json_rows
+        logged = db.query(PredictionLog).all()
+    assert len(logged) == columnar_rows
+    if logged:
+        assert logged[0].feature3 == 3.0
+        assert logged[0].model_version == "v2"
+        assert logged[0].label == "label ok"
+
+
+@pytest.mark.anyio
+async def test_writer_stamps_rows_when_queued(session_factory):
+    now = [1_000.0]
+    writer = RequestLogWriter(
+        session_factory, log_format="columnar", flush_interval=60, clock=lambda: now[0]
+    )
+    payload = {f"feature{i}": float(i) for i in range(1, 6)}
+    response = MachineLearningResponse(prediction=1.0, prediction_label="label ok")
+
+    writer.enqueue([(payload, response)])
+    now[0] = 2_000.0
+    await writer.stop()
+
+    with session_factory() as db:
+        assert db.query(PredictionLog).one().created_ms == 1_000_000
+
+
+def test_writer_rejects_unknown_log_format(session_factory):
+    with pytest.raises(ValueError):
+        RequestLogWriter(session_factory, log_format="csv")
+
+
+def test_label_counts_per_window(client):
+    response = client.get("/api/v1/logs/labels", params={"window": 60})
+    assert response.json() == {
+        "window_seconds": 60,
+        "counts": [
+            {"window_start": 0.0, "label": "label nok", "count": 1},
+            {"window_start": 0.0, "label": "label ok", "count": 1},
+            {"window_start": 60.0, "label": "label ok", "count": 2},
+        ],
+    }
+
+
+def test_label_counts_filters_on_model_and_time(client):
+    response = client.get(
+        "/api/v1/logs/labels", params={"window": 60, "model": "default", "since": 60}
+    )
+    assert response.json()["counts"] == [
+        {"window_start": 60.0, "label": "label ok", "count": 1}
+    ]
+
+
+def test_feature_stats(client):
+    body = client.get("/api/v1/logs/features").json()
+    assert body["count"] == 4
+    assert body["features"]["feature1"]["mean"] == pytest.approx(4.0)
+    assert body["features"]["feature5"]["variance"] == pytest.approx(5.0)
+
+
+def test_feature_stats_empty_window(client):
+    body = client.get("/api/v1/logs/features", params={"since": 10_000}).json()
+    assert body["count"] == 0
+    assert body["features"]["feature1"] == {"mean": None, "variance": None}
@@ -0,0 +1,56 @@
+from fastapi.testclient import TestClient
+
+from api.routes import predictor
+from main import get_application
+from services.metrics import MetricsRegistry
+
+
+def sample_payload():
+    return {f"feature{i}": 1.0 for i in range(1, 6)}
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    family = registry.histogram("work_seconds", "Work.", ("stage",), buckets=(0.1, 1))
+    child = family.labels("parse")
+    for value in (0.05, 0.1, 0.5, 3):
+        child.observe(value)
+
+    text = registry.render()
+
+    assert 'work_seconds_bucket{stage="parse",le="0.1"} 2' in text
+    assert 'work_seconds_bucket{stage="parse",le="1.0"} 3' in text
+    assert 'work_seconds_bucket{stage="parse",le="+Inf"} 4' in text
+    assert 'work_seconds_count{stage="parse"} 4' in text
+    assert "# TYPE work_seconds histogram" in text
+
+
+def test_callback_gauge_is_read_at_scrape_time():
+    registry = MetricsRegistry()
+    depth = [1]
+    registry.gauge("queue_depth", "Depth.", fn=lambda: depth[0])
+    depth[0] = 7
+    assert "queue_depth 7.0" in registry.render()
+
+
+def test_metrics_endpoint_reports_predict_stages(monkeypatch):
+    monkeypatch.setattr(predictor, "get_prediction", lambda data: [1] * len(data))
+    monkeypatch.setattr(predictor, "log_requests", lambda *args: None)
+    client = TestClient(get_application())
+    before = predictor.model_stage.count
+
+    assert client.post("/api/v1/predict", json=sample_payload()).status_code == 200
+    response = client.get("/api/v1/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert predictor.model_stage.count == before + 1
+    assert 'predict_stage_seconds_count{stage="parse"}' in text
+    assert 'predict_stage_seconds_count{stage="queue"}' in text
+    assert (
+        'http_request_duration_seconds_count{route="/api/v1/predict",method="POST"}'
+        in text
+    )
+    assert "inference_queue_depth 0.0" in text
+    assert "prediction_cache_hit_ratio" in text
@@ -0,0 +1,99 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from ml.data import make_dataset
+from ml.features import build_features
+from ml.partitions import MANIFEST
+
+
+def write_raw(path, rows, bad_rows=0):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.random((rows, 5)), columns=make_dataset.FEATURES)
+    frame["label"] = rng.integers(0, 2, rows)
+    frame["note"] = "x"
+    frame.loc[: bad_rows - 1, "feature2"] = np.nan
+    frame.to_csv(path, index=False)
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    raw, interim, processed = (tmp_path / name for name in ("raw", "i", "p"))
+    raw.mkdir()
+    write_raw(raw / "a.csv", 25, bad_rows=5)
+    write_raw(raw / "b.csv", 10)
+    return raw, interim, processed
+
+
+def test_make_dataset_chunks_into_partitions(dirs):
+    raw, interim, _ = dirs
+    stats = make_dataset.pipeline(raw, interim, chunk_rows=10, workers=1)
+
+    assert stats == {"built": 2, "skipped": 0, "removed": 0}
+    parts = sorted(p.name for p in (interim / "source=a").glob("*.parquet"))
+    assert parts == ["part-00000.parquet", "part-00001.parquet", "part-00002.parquet"]
+    frame = pd.read_parquet(interim / "source=a")
+    assert len(frame) == 20
+    assert list(frame.columns) == make_dataset.FEATURES + ["label"]
+    assert set(json.loads((interim / MANIFEST).read_text())) == {"a.csv", "b.csv"}
+
+
+def test_stages_skip_unchanged_inputs(dirs):
+    raw, interim, processed = dirs
+    make_dataset.pipeline(raw, interim, chunk_rows=10, workers=1)
+    assert build_features.pipeline(interim, processed, workers=2)["built"] == 4
+
+    write_raw(raw / "b.csv", 12)
+    (raw / "a.csv").unlink()
+
+    stats = make_dataset.pipeline(raw, interim, chunk_rows=10, workers=1)
+    assert stats == {"built": 1, "skipped": 0, "removed": 1}
+    assert not (interim / "source=a").exists()
+    stats = build_features.pipeline(interim, processed, workers=1)
+    assert stats == {"built": 2, "skipped": 0, "removed": 3}
+    assert make_dataset.pipeline(raw, interim, workers=1)["skipped"] == 1
+    assert build_features.pipeline(interim, processed, workers=1)["built"] == 0
+
+
+def test_dotted_file_names_get_their_own_partition(tmp_path):
+    raw, interim = tmp_path / "raw", tmp_path / "i"
+    raw.mkdir()
+    write_raw(raw / "sales.2024.csv", 2)
+    write_raw(raw / "sales.2025.csv", 1)
+
+    stats = make_dataset.pipeline(raw, interim, workers=2)
+
+    assert stats == {"built": 2, "skipped": 0, "removed": 0}
+    assert len(pd.read_parquet(interim / "source=sales.2024")) == 2
+    assert len(pd.read_parquet(interim / "source=sales.2025")) == 1
+    assert make_dataset.pipeline(raw, interim, workers=1)["skipped"] == 2
+
+    (raw / "sales.2024.csv").unlink()
+    assert make_dataset.pipeline(raw, interim, workers=1)["removed"] == 1
+    assert not (interim / "source=sales.2024").exists()
+    assert len(pd.read_parquet(interim / "source=sales.2025")) == 1
+
+
+def test_compressed_and_plain_copies_are_rejected(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    write_raw(raw / "a.csv", 2)
+    write_raw(raw / "a.csv.gz", 2)
+
+    with pytest.raises(ValueError, match="share a partition"):
+        make_dataset.pipeline(raw, tmp_path / "i", workers=1)
+
+
+def test_build_features_adds_row_summaries(dirs):
+    raw, interim, processed = dirs
+    make_dataset.pipeline(raw, interim, workers=1)
+    build_features.pipeline(interim, processed, workers=1)
+
+    frame = pd.read_parquet(processed / "source=b")
+    values = frame[make_dataset.FEATURES].to_numpy()
+    assert np.allclose(frame["row_mean"], values.mean(axis=1))
+    assert np.allclose(frame["row_max"], values.max(axis=1))
@@ -1,5 +1,6 @@
 import os
 
+import numpy as np
 import pytest
 
 import services.predict as predict
@@ -22,7 +23,10 @@ def test_predict_success(monkeypatch):
 
 
 def test_predict_missing_method(monkeypatch):
-    predict.MachineLearningModelHandlerScore.model = {"model": object(), "scaler": DummyScaler()}
+    predict.MachineLearningModelHandlerScore.model = {
+        "model": object(),
+        "scaler": DummyScaler(),
+    }
     with pytest.raises(predict.PredictException):
         predict.MachineLearningModelHandlerScore.predict([[1]])
 
@@ -72,3 +76,96 @@ def test_load_model_empty(tmp_path, monkeypatch):
 
     with pytest.raises(predict.ModelLoadException):
         predict.MachineLearningModelHandlerScore.load(fake_loader)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_prediction_cache_hit_and_miss():
+    cache = predict.PredictionCache(max_size=2, ttl=10)
+    model = DummyModel()
+    assert cache.get((1.0,), model) is None
+    cache.set((1.0,), 42.0, model)
+    assert cache.get((1.0,), model) == 42.0
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+def test_prediction_cache_evicts_least_recently_used():
+    cache = predict.PredictionCache(max_size=2, ttl=10)
+    model = DummyModel()
+    cache.set((1.0,), 1.0, model)
+    cache.set((2.0,), 2.0, model)
+    cache.get((1.0,), model)
+    cache.set((3.0,), 3.0, model)
+    assert cache.get((2.0,), model) is None
+    assert cache.get((1.0,), model) == 1.0
+    assert cache.evictions == 1
+
+
+def test_prediction_cache_expires_entries():
+    clock = FakeClock()
+    cache = predict.PredictionCache(ttl=5, clock=clock)
+    model = DummyModel()
+    cache.set((1.0,), 1.0, model)
+    clock.now = 5.0
+    assert cache.get((1.0,), model) is None
+    assert cache.evictions == 1
+
+
+def test_prediction_cache_invalidated_by_model_change():
+    cache = predict.PredictionCache()
+    cache.set((1.0,), 1.0, DummyModel())
+    assert cache.get((1.0,), DummyModel()) is None
+    assert cache.invalidations == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_prediction_cache_skips_results_of_a_swapped_model():
+    cache = predict.PredictionCache()
+    old, new = DummyModel(), DummyModel()
+    assert cache.get((1.0,), old) is None
+    # the model is reloaded while the prediction of ``old`` is in flight
+    assert cache.get((2.0,), new) is None
+    cache.set((1.0,), 1.0, old)
+    assert cache.get((1.0,), new) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_load_mmap_maps_arrays_read_only(tmp_path):
+    path = tmp_path / "model.pkl"
+    predict.joblib.dump({"weights": np.arange(10.0)}, path, compress=3)
+
+    model = predict.load_mmap(str(path))
+
+    assert isinstance(model["weights"], np.memmap)
+    assert not model["weights"].flags.writeable
+    assert model["weights"].tolist() == list(range(10))
+    assert len(list(tmp_path.glob("model.pkl.*.mmap"))) == 1
+
+
+def test_load_mmap_follows_content_not_mtime(tmp_path):
+    path = tmp_path / "model.pkl"
+    predict.joblib.dump({"weights": np.zeros(3)}, path)
+    predict.load_mmap(str(path))
+    old_mtime = path.stat().st_mtime - 3600
+    predict.joblib.dump({"weights": np.ones(3)}, path)
+    os.utime(path, (old_mtime, old_mtime))
+
+    model = predict.load_mmap(str(path))
+
+    assert model["weights"].tolist() == [1.0, 1.0, 1.0]
+    assert len(list(tmp_path.glob("model.pkl.*.mmap"))) == 1
+
+
+def test_get_load_wrapper(monkeypatch):
+    monkeypatch.setattr(predict, "MODEL_MMAP_MODE", "")
+    assert predict.get_load_wrapper() is predict.joblib.load
+    monkeypatch.setattr(predict, "MODEL_MMAP_MODE", "r")
+    assert predict.get_load_wrapper().func is predict.load_mmap
@@ -0,0 +1,127 @@
+import threading
+
+import joblib
+import pytest
+from fastapi.testclient import TestClient
+
+from api.routes import predictor
+from core.errors import ModelNotFoundException
+from main import get_application
+from services.registry import ModelRegistry, parse_traffic_split
+
+
+class ConstantModel:
+    def __init__(self, value):
+        self.value = value
+
+    def predict(self, data):
+        return [self.value] * len(data)
+
+
+def sample_payload():
+    return {f"feature{i}": 1.0 for i in range(1, 6)}
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    for version, value in (("v1", 1), ("v2", 0)):
+        (tmp_path / version).mkdir()
+        joblib.dump(ConstantModel(value), tmp_path / version / "model.pkl")
+    return tmp_path
+
+
+def test_parse_traffic_split():
+    assert parse_traffic_split("") == {}
+    assert parse_traffic_split("default:90, v2:10") == {"default": 90.0, "v2": 10.0}
+
+
+def test_registry_loads_lazily_and_counts_latency(model_dir):
+    registry = ModelRegistry(joblib.load, str(model_dir), "model.pkl")
+    assert registry.loads == 0
+    assert registry.predict("v1", [[1.0] * 5]) == [1]
+    assert registry.predict("v1", [[1.0] * 5]) == [1]
+    assert registry.loads == 1
+    registry.record("v1", 0.002)
+    registry.record(None, 0.001)
+    stats = registry.stats()
+    assert stats["v1"]["requests"] == 1
+    assert stats["v1"]["loaded"] is True
+    assert stats["default"]["latency_p50_ms"] == pytest.approx(1.0)
+
+
+def test_registry_cold_load_does_not_block_loaded_versions(model_dir):
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_load(path):
+        if "v2" in path:
+            started.set()
+            release.wait(5)
+        return joblib.load(path)
+
+    registry = ModelRegistry(slow_load, str(model_dir), "model.pkl")
+    registry.get("v1")
+    loader = threading.Thread(target=registry.get, args=("v2",))
+    loader.start()
+    assert started.wait(5)
+    assert registry.predict("v1", [[1.0] * 5]) == [1]
+    release.set()
+    loader.join()
+    assert registry.loads == 2
+
+
+def test_registry_evicts_least_recently_used(model_dir):
+    size = (model_dir / "v1" / "model.pkl").stat().st_size
+    registry = ModelRegistry(
+        joblib.load, str(model_dir), "model.pkl", memory_budget_bytes=size
+    )
+    registry.get("v1")
+    registry.get("v2")
+    assert registry.evictions == 1
+    assert registry.stats()["v1"]["loaded"] is False
+    assert registry.stats()["v2"]["loaded"] is True
+
+
+def test_registry_resolve(model_dir):
+    registry = ModelRegistry(
+        joblib.load, str(model_dir), "model.pkl", traffic_split={"v2": 1}
+    )
+    assert registry.resolve() == "v2"
+    assert registry.resolve("default") is None
+    assert registry.resolve("v1") == "v1"
+    with pytest.raises(ModelNotFoundException):
+        registry.resolve("../v1")
+    with pytest.raises(ModelNotFoundException):
+        registry.get("v3")
+
+
+def test_predict_routes_on_model_query(monkeypatch, model_dir):
+    registry = ModelRegistry(joblib.load, str(model_dir), "model.pkl")
+    monkeypatch.setattr(predictor, "registry", registry)
+    monkeypatch.setattr(predictor, "log_requests", lambda *args: None)
+    client = TestClient(get_application())
+
+    response = client.post("/api/v1/predict?model=v2", json=sample_payload())
+    assert response.json() == {"prediction": 0.0, "prediction_label": "label nok"}
+    response = client.post("/api/v1/predict/batch?model=v1", json=[sample_payload()])
+    assert response.json()["predictions"][0]["prediction_label"] == "label ok"
+    response = client.post("/api/v1/predict?model=v3", json=sample_payload())
+    assert response.status_code == 404
+
+    models = client.get("/api/v1/admin/models").json()
+    assert set(models["versions"]) == {"v1", "v2"}
+
+
+def test_default_model_requests_are_counted(monkeypatch, model_dir):
+    registry = ModelRegistry(joblib.load, str(model_dir), "model.pkl")
+    monkeypatch.setattr(predictor, "registry", registry)
+    monkeypatch.setattr(predictor, "log_requests", lambda *args: None)
+    monkeypatch.setattr(predictor, "get_prediction", lambda data: [1] * len(data))
+    client = TestClient(get_application())
+
+    client.post("/api/v1/predict", json=sample_payload())
+    client.post("/api/v1/predict?model=v2", json=sample_payload())
+
+    versions = client.get("/api/v1/admin/models").json()["versions"]
+    assert versions["default"]["requests"] == 1
+    assert versions["v2"]["requests"] == 1
@@ -1,25 +1,53 @@
+import asyncio
 import json
 
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from api.routes import predictor
 from db import Base
-from models.log import RequestLog
-from models.prediction import MachineLearningDataInput
+from models.log import PredictionLog, RequestLog
+from models.prediction import MachineLearningDataInput, MachineLearningResponse
+from services.log_writer import RequestLogWriter
 
 
 @pytest.fixture
 def anyio_backend():
     return "asyncio"
 
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+def sample_pair(value=1.0):
+    payload = {f"feature{i}": value for i in range(1, 6)}
+    return (
+        MachineLearningDataInput(**payload),
+        MachineLearningResponse(prediction=1.0, prediction_label="label ok"),
+    )
+
+
 @pytest.mark.anyio
 async def test_predict_logs_request_response(monkeypatch):
-    engine = create_engine("sqlite:///:memory:")
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
     TestingSessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
     Base.metadata.create_all(bind=engine)
     monkeypatch.setattr(predictor, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(predictor, "log_writer", RequestLogWriter(TestingSessionLocal))
     monkeypatch.setattr(predictor, "get_prediction", lambda data: [1])
 
     payload = {
@@ -33,6 +61,7 @@ async def test_predict_logs_request_response(monkeypatch):
 
     response = await predictor.predict(data)
     assert response.prediction == 1.0
+    await predictor.log_writer.stop()
 
     db = TestingSessionLocal()
     logs = db.query(RequestLog).all()
@@ -41,3 +70,63 @@ async def test_predict_logs_request_response(monkeypatch):
     assert json.loads(log.request) == data.model_dump()
     assert json.loads(log.response) == response.model_dump()
     db.close()
+
+
+@pytest.mark.anyio
+async def test_predict_logs_synchronously_when_async_disabled(
+    monkeypatch, session_factory
+):
+    monkeypatch.setattr(predictor, "REQUEST_LOG_ASYNC", False)
+    monkeypatch.setattr(predictor, "SessionLocal", session_factory)
+    monkeypatch.setattr(predictor, "get_prediction", lambda data: [1])
+
+    await predictor.predict(sample_pair()[0])
+
+    with session_factory() as db:
+        assert db.query(PredictionLog).count() == 1
+
+
+@pytest.mark.anyio
+async def test_writer_flushes_in_bulk_on_batch_size(session_factory):
+    writer = RequestLogWriter(session_factory, batch_size=3, flush_interval=60)
+    writer.enqueue([sample_pair(i) for i in range(3)])
+    for _ in range(100):
+        if writer.written:
+            break
+        await asyncio.sleep(0.01)
+    await writer.stop()
+
+    assert writer.written == 3
+    with session_factory() as db:
+        assert db.query(RequestLog).count() == 3
+
+
+@pytest.mark.anyio
+async def test_writer_flushes_remaining_rows_on_stop(session_factory):
+    writer = RequestLogWriter(session_factory, batch_size=100, flush_interval=60)
+    writer.enqueue([sample_pair()])
+    assert writer.written == 0
+
+    await writer.stop()
+
+    assert writer.stats() == {"queued": 0, "written": 1, "dropped": 0, "failed": 0}
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "overflow, kept", [("drop_newest", [0.0, 1.0]), ("drop_oldest", [1.0, 2.0])]
+)
+async def test_writer_overflow_policy(session_factory, overflow, kept):
+    writer = RequestLogWriter(
+        session_factory, max_queue_size=2, batch_size=100, overflow=overflow
+    )
+    writer.enqueue([sample_pair(i) for i in range(3)])
+
+    assert writer.dropped == 1
+    assert [pair[0].feature1 for pair in writer.queue] == kept
+    await writer.stop()
+
+
+def test_writer_rejects_unknown_overflow_policy(session_factory):
+    with pytest.raises(ValueError):
+        RequestLogWriter(session_factory, overflow="block")
@@ -0,0 +1,135 @@
+import asyncio
+import json
+
+import pandas as pd
+import pytest
+from sqlalchemy import func, insert, select
+
+pytest.importorskip("pyarrow")
+
+from db import Base, create_engines
+from models.log import PredictionLog, RequestLog
+from services.retention import LogRetention
+
+NOW = 1_700_000_000.0
+DAY_MS = 86400 * 1000
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine, _ = create_engines(f"sqlite:///{tmp_path / 'logs.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def fill(engine, old, recent, request_rows):
+    features = {f"feature{i}": float(i) for i in range(1, 6)}
+    rows = [
+        dict(
+            created_ms=int(NOW * 1000) - age_days * DAY_MS,
+            model_version="default",
+            prediction=1.0,
+            label="label ok",
+            **features,
+        )
+        for age_days in [10] * old + [1] * recent
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(PredictionLog), rows)
+        if request_rows:
+            connection.execute(
+                insert(RequestLog),
+                [
+                    {"request": json.dumps(features), "response": json.dumps({"x": i})}
+                    for i in range(request_rows)
+                ],
+            )
+
+
+def count(engine, model):
+    with engine.connect() as connection:
+        return connection.execute(select(func.count(model.id))).scalar()
+
+
+def test_old_rows_are_archived_and_deleted_in_batches(engine, tmp_path):
+    fill(engine, old=25, recent=5, request_rows=12)
+    retention = LogRetention(
+        engine,
+        tmp_path / "archive",
+        hot_days=7,
+        hot_rows=4,
+        batch_rows=10,
+        pause=0,
+        clock=lambda: NOW,
+    )
+
+    archived = asyncio.run(retention.run_once())
+
+    assert archived == 25 + 8
+    assert count(engine, PredictionLog) == 5
+    assert count(engine, RequestLog) == 4
+    files = sorted((tmp_path / "archive" / "prediction_logs").glob("*.parquet"))
+    assert [path.name for path in files][0] == "part-000000000001-000000000010.parquet"
+    assert len(files) == 3
+    frame = pd.concat(pd.read_parquet(path) for path in files)
+    assert frame["id"].tolist() == list(range(1, 26))
+    requests = pd.read_parquet(tmp_path / "archive" / "request_logs")
+    assert requests["id"].tolist() == list(range(1, 9))
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2
+        assert connection.exec_driver_sql("PRAGMA freelist_count").scalar() == 0
+
+
+def test_retention_yields_to_waiting_traffic(engine, tmp_path):
+    fill(engine, old=5, recent=0, request_rows=0)
+    busy = [True]
+    retention = LogRetention(
+        engine,
+        tmp_path / "archive",
+        batch_rows=2,
+        pause=0,
+        busy_fn=lambda: busy[0],
+        clock=lambda: NOW,
+    )
+
+    assert asyncio.run(retention.run_once()) == 0
+    assert retention.stats()["postponed"] == 1
+    busy[0] = False
+    assert asyncio.run(retention.run_once()) == 5
+    assert retention.stats()["runs"] == 1
+
+
+def test_archives_are_never_overwritten(engine, tmp_path):
+    archive = tmp_path / "archive"
+    retention = LogRetention(engine, archive, pause=0, clock=lambda: NOW)
+    fill(engine, old=3, recent=0, request_rows=0)
+    asyncio.run(retention.run_once())
+    fill(engine, old=3, recent=0, request_rows=0)
+    asyncio.run(retention.run_once())
+
+    frame = pd.read_parquet(archive / "prediction_logs")
+    # ids are not reused once the table has been emptied
+    assert frame["id"].tolist() == list(range(1, 7))
+
+    # a different batch under a taken name gets its own file, a batch that
+    # was archived but not deleted is only deleted
+    taken = archive / "prediction_logs" / "part-000000000007-000000000008.parquet"
+    pd.DataFrame({"id": [7, 8]}).to_parquet(taken)
+    fill(engine, old=2, recent=0, request_rows=0)
+    asyncio.run(retention.run_once())
+    assert (taken.parent / "part-000000000007-000000000008-1.parquet").exists()
+
+    # the pass was interrupted after writing the file of row 9
+    fill(engine, old=1, recent=0, request_rows=0)
+    with engine.connect() as connection:
+        result = connection.execute(select(PredictionLog.__table__))
+        interrupted = pd.DataFrame(result.all(), columns=list(result.keys()))
+    interrupted.to_parquet(
+        taken.parent / "part-000000000009-000000000009.parquet", index=False
+    )
+    files = retention.files
+    assert asyncio.run(retention.run_once()) == 1
+    assert retention.files == files
+    assert count(engine, PredictionLog) == 0
+    assert not (taken.parent / "part-000000000009-000000000009-1.parquet").exists()
@@ -0,0 +1,91 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+import api.routes.predictor as predictor
+from models.prediction import MachineLearningDataInput
+from services.predict import MachineLearningModelHandlerScore
+from services.shadow import ShadowEvaluator
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class HalfModel:
+    def predict(self, data):
+        return data[:, 0] / 2
+
+
+@pytest.mark.anyio
+async def test_shadow_keeps_aggregates_only():
+    calls = []
+
+    def predict_fn(data_points):
+        calls.append(len(data_points))
+        return data_points[:, 0] * (data_points[:, 1] > 0)
+
+    shadow = ShadowEvaluator(predict_fn, batch_size=3, flush_interval=60)
+    for value, sign in ((1.0, 1), (2.0, -1), (3.0, 1), (4.0, -1)):
+        shadow.enqueue(np.array([[value, sign]]), [value])
+    await shadow.flush()
+    while shadow.stats()["compared"] < 4:
+        await asyncio.sleep(0.01)
+    await shadow.stop()
+
+    assert calls == [3, 1]
+    stats = shadow.stats()
+    assert stats["compared"] == 4
+    assert stats["agreed"] == 2
+    assert stats["agreement_rate"] == 0.5
+    assert stats["mean_abs_diff"] == 1.5
+    assert stats["batches"] == 2
+
+
+@pytest.mark.anyio
+async def test_shadow_sheds_when_full_or_busy_and_counts_failures():
+    busy = [False]
+
+    def broken(data_points):
+        raise ValueError("fail")
+
+    shadow = ShadowEvaluator(
+        broken, max_queue_rows=2, flush_interval=60, busy_fn=lambda: busy[0]
+    )
+    shadow.enqueue(np.ones((2, 5)), [1, 1])
+    shadow.enqueue(np.ones((1, 5)), [1])
+    assert shadow.stats()["shed"] == 1
+    busy[0] = True
+    await shadow.flush()
+    assert shadow.stats()["shed"] == 3
+    busy[0] = False
+    shadow.enqueue(np.ones((1, 5)), [1])
+    await shadow.flush()
+    await shadow.stop()
+    assert shadow.stats()["failed"] == 1
+    assert shadow.stats()["compared"] == 0
+
+
+@pytest.mark.anyio
+async def test_predict_replays_main_predictions_to_shadow(monkeypatch):
+    monkeypatch.setattr(predictor, "get_prediction", lambda data: data[:, 0] / 2)
+    monkeypatch.setattr(predictor, "log_requests", lambda *args: None)
+    monkeypatch.setattr(predictor, "MICRO_BATCHING_FLAG", False)
+    monkeypatch.setattr(
+        predictor, "shadow", ShadowEvaluator(predictor.shadow.predict_fn)
+    )
+    MachineLearningModelHandlerScore.register_shadow(HalfModel(), "v2")
+    try:
+        for value in (2.0, 4.0):
+            payload = {f"feature{i}": value for i in range(1, 6)}
+            await predictor.predict(MachineLearningDataInput(**payload))
+        await predictor.shadow.flush()
+    finally:
+        MachineLearningModelHandlerScore.register_shadow(None)
+        await predictor.shadow.stop()
+
+    stats = predictor.shadow.stats()
+    assert stats["compared"] == 2
+    assert stats["agreement_rate"] == 1.0
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.routes import predictor
+from main import get_application
+from services.codec import DecodeError, StreamDecoder, iter_line_chunks
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    calls = []
+
+    def fake_prediction(data):
+        calls.append(len(data))
+        return (data[:, 0] > 1).astype(int)
+
+    monkeypatch.setattr(predictor, "get_prediction", fake_prediction)
+    monkeypatch.setattr(predictor, "STREAM_CHUNK_ROWS", 2)
+    test_client = TestClient(get_application())
+    test_client.calls = calls
+    return test_client
+
+
+async def byte_stream(*parts):
+    for part in parts:
+        yield part
+
+
+@pytest.mark.anyio
+async def test_iter_line_chunks_joins_split_lines():
+    chunks = [
+        lines
+        async for lines in iter_line_chunks(byte_stream(b"a\nb", b"b\n\nc\nd", b"d"), 2)
+    ]
+    assert chunks == [[b"a", b"bb"], [b"c", b"dd"]]
+
+
+def test_csv_decoder_maps_header_columns():
+    decoder = StreamDecoder("csv")
+    header = b"id,feature5,feature4,feature3,feature2,feature1"
+    first = decoder.decode([header, b"7,5,4,3,2,1"])
+    second = decoder.decode([b"8,1,1,1,1,2"])
+    assert first.tolist() == [[1.0, 2.0, 3.0, 4.0, 5.0]]
+    assert second.tolist() == [[2.0, 1.0, 1.0, 1.0, 1.0]]
+
+
+def test_csv_decoder_rejects_missing_columns():
+    with pytest.raises(DecodeError):
+        StreamDecoder("csv").decode([b"feature1,feature2"])
+
+
+def test_stream_ndjson_scores_in_chunks(client):
+    rows = [{f"feature{i}": float(value) for i in range(1, 6)} for value in range(5)]
+    body = "\n".join(json.dumps(row) for row in rows).encode()
+    response = client.post(
+        "/api/v1/predict/stream",
+        content=body,
+        headers={"content-type": "application/x-ndjson"},
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.status_code == 200
+    assert [line["prediction"] for line in lines] == [0.0, 0.0, 1.0, 1.0, 1.0]
+    assert client.calls == [2, 2, 1]
+
+
+def test_stream_csv(client):
+    body = b"feature1,feature2,feature3,feature4,feature5\n2,1,1,1,1\n0,1,1,1,1\n"
+    response = client.post(
+        "/api/v1/predict/stream", content=body, headers={"content-type": "text/csv"}
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["prediction_label"] for line in lines] == ["label ok", "label nok"]
+
+
+def test_stream_reports_bad_row_and_stops(client):
+    body = b"feature1,feature2,feature3,feature4,feature5\n2,1,1,1,1\nx,1,1,1,1\n"
+    response = client.post("/api/v1/predict/stream?format=csv", content=body)
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0] == {"prediction": 1.0, "prediction_label": "label ok"}
+    assert lines[1]["row"] == 1
+    assert len(lines) == 2
+
+
+def test_stream_rejects_unknown_format(client):
+    response = client.post("/api/v1/predict/stream?format=xml", content=b"")
+    assert response.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_iter_line_chunks_rejects_overlong_line():
+    chunks = iter_line_chunks(
+        byte_stream(b"a\n", b"bbbb", b"bbbb"), 2, max_line_bytes=6
+    )
+    with pytest.raises(DecodeError):
+        [lines async for lines in chunks]
@@ -0,0 +1,68 @@
+import joblib
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, insert
+
+pytest.importorskip("click")
+
+from ml.model import train_model
+from models.log import PredictionLog
+
+
+def add_rows(engine, start, count):
+    rng = np.random.default_rng(start)
+    features = rng.normal(size=(count, 5))
+    rows = [
+        dict(
+            created_ms=start + index,
+            model_version="default",
+            prediction=float(row[0] + row[1] > 0),
+            label="label ok",
+            **{f"feature{i}": float(value) for i, value in enumerate(row, start=1)},
+        )
+        for index, row in enumerate(features)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(PredictionLog), rows)
+
+
+@pytest.fixture
+def database(tmp_path):
+    url = f"sqlite:///{tmp_path / 'logs.db'}"
+    engine = create_engine(url)
+    PredictionLog.__table__.create(engine)
+    yield url, engine
+    engine.dispose()
+
+
+def test_training_resumes_from_checkpoint(database, tmp_path, monkeypatch):
+    url, engine = database
+    checkpoint = tmp_path / "checkpoint.pkl"
+    model_dir = tmp_path / "models"
+    add_rows(engine, 0, 250)
+
+    path = train_model.train(url, model_dir, checkpoint_path=checkpoint, chunk_rows=100)
+
+    assert path == model_dir / "incremental-250" / "model.pkl"
+    state = joblib.load(checkpoint)
+    assert state["last_id"] == 250 and state["rows"] == 250
+    model = joblib.load(path)
+    data = np.random.default_rng(7).normal(size=(200, 5))
+    accuracy = (model.predict(data) == (data[:, 0] + data[:, 1] > 0)).mean()
+    assert accuracy > 0.9
+
+    assert train_model.train(url, model_dir, checkpoint_path=checkpoint) is None
+
+    add_rows(engine, 1000, 40)
+    seen = []
+    original = train_model.Checkpoint.update
+
+    def spy(self, last_id, features, targets):
+        seen.append(len(targets))
+        original(self, last_id, features, targets)
+
+    monkeypatch.setattr(train_model.Checkpoint, "update", spy)
+    path = train_model.train(url, model_dir, checkpoint_path=checkpoint)
+    assert seen == [40]
+    assert path.parent.name == "incremental-290"
+    assert joblib.load(checkpoint)["rows"] == 290
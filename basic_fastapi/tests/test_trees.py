@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification, make_regression
+from sklearn.ensemble import (
+    ExtraTreesRegressor,
+    GradientBoostingClassifier,
+    RandomForestClassifier,
+)
+from sklearn.tree import DecisionTreeClassifier
+
+import services.predict as predict
+from services.trees import CompiledTreeModel, compile_model, load_compiled
+
+
+def classification(classes=2):
+    return make_classification(
+        n_samples=500,
+        n_features=5,
+        n_informative=4,
+        n_redundant=0,
+        n_classes=classes,
+        random_state=0,
+    )
+
+
+@pytest.mark.parametrize(
+    "estimator, classes",
+    [
+        (DecisionTreeClassifier(random_state=0), 2),
+        (RandomForestClassifier(n_estimators=25, random_state=0), 2),
+        (RandomForestClassifier(n_estimators=25, max_depth=6, random_state=0), 3),
+    ],
+)
+def test_compiled_classifier_matches_estimator(estimator, classes):
+    data, labels = classification(classes)
+    estimator.fit(data, labels)
+    compiled = compile_model(estimator)
+    rows = np.random.default_rng(1).normal(size=(2000, 5))
+    assert np.array_equal(compiled.predict(rows), estimator.predict(rows))
+    np.testing.assert_allclose(
+        compiled.predict_proba(rows), estimator.predict_proba(rows), rtol=1e-12
+    )
+
+
+def test_compiled_regressor_matches_estimator():
+    data, target = make_regression(n_samples=500, n_features=5, random_state=0)
+    estimator = ExtraTreesRegressor(n_estimators=20, random_state=0).fit(data, target)
+    compiled = compile_model(estimator)
+    rows = np.random.default_rng(1).normal(size=(2000, 5))
+    np.testing.assert_allclose(
+        compiled.predict(rows), estimator.predict(rows), rtol=1e-12
+    )
+    with pytest.raises(AttributeError):
+        compiled.predict_proba(rows)
+
+
+def test_compiled_falls_back_for_unexpected_input():
+    data, labels = classification()
+    estimator = RandomForestClassifier(n_estimators=5, random_state=0).fit(data, labels)
+    compiled = compile_model(estimator)
+    with pytest.raises(ValueError):
+        compiled.predict([[1.0, 2.0]])
+
+
+def test_unsupported_models_load_unchanged(tmp_path):
+    data, labels = classification()
+    estimator = GradientBoostingClassifier(n_estimators=5).fit(data, labels)
+    assert compile_model(estimator) is None
+    assert load_compiled(lambda path: estimator, tmp_path) is estimator
+
+
+def test_load_wrapper_compiles_behind_flag(monkeypatch):
+    data, labels = classification()
+    estimator = RandomForestClassifier(n_estimators=5, random_state=0).fit(data, labels)
+    monkeypatch.setattr(predict.joblib, "load", lambda path: estimator)
+    assert predict.get_load_wrapper()("model.pkl") is estimator
+    monkeypatch.setattr(predict, "MODEL_COMPILE_FLAG", True)
+    assert isinstance(predict.get_load_wrapper()("model.pkl"), CompiledTreeModel)
+
+
+def test_large_batches_and_nan_use_estimator(monkeypatch):
+    data, labels = classification()
+    estimator = RandomForestClassifier(n_estimators=5, random_state=0).fit(data, labels)
+    compiled = compile_model(estimator, max_rows=10)
+    monkeypatch.setattr(
+        compiled, "_aggregate", lambda data: pytest.fail("compiled path used")
+    )
+    rows = np.random.default_rng(1).normal(size=(11, 5))
+    assert np.array_equal(compiled.predict(rows), estimator.predict(rows))
+    rows[0, 0] = np.nan
+    assert np.array_equal(compiled.predict(rows[:2]), estimator.predict(rows[:2]))
+
+
+@pytest.mark.parametrize("value", [np.inf, -np.inf, 1e39])
+def test_non_finite_inputs_raise_like_estimator(value):
+    data, labels = classification()
+    estimator = RandomForestClassifier(n_estimators=5, random_state=0).fit(data, labels)
+    compiled = compile_model(estimator)
+    rows = [[value, 0.0, 0.0, 0.0, 0.0]]
+    with pytest.raises(ValueError):
+        estimator.predict(rows)
+    with pytest.raises(ValueError):
+        compiled.predict(rows)